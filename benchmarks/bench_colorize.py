@@ -0,0 +1,68 @@
+"""Benchmarks for `Pastel.colorize()`.
+
+Run with `python benchmarks/runner.py bench_colorize.py`.
+"""
+from proper_cli.pastel import Pastel
+
+
+def make_report(lines: int) -> str:
+    """A colored diff-like report, as the ones piped through `echo()`."""
+    out = []
+    for i in range(lines):
+        if i % 3 == 0:
+            out.append(f"<fg=green>+ added line {i}</> with \\<escaped> text")
+        elif i % 3 == 1:
+            out.append(f"<fg=red>- removed <options=bold>line</> {i}</>")
+        else:
+            out.append(f"<info>  context</info> line {i} <comment>(note)</comment>")
+    return "\n".join(out)
+
+
+def bench_colorize_100kb():
+    pastel = Pastel(True)
+    message = make_report(2_000)
+    return lambda: pastel.colorize(message)
+
+
+def bench_colorize_1mb():
+    pastel = Pastel(True)
+    message = make_report(20_000)
+    return lambda: pastel.colorize(message)
+
+
+def bench_colorize_5mb():
+    pastel = Pastel(True)
+    message = make_report(100_000)
+    return lambda: pastel.colorize(message)
+
+
+def bench_colorize_stream_1mb():
+    pastel = Pastel(True)
+    lines = make_report(20_000).splitlines(keepends=True)
+
+    def run():
+        for _ in pastel.colorize_stream(lines):
+            pass
+
+    return run
+
+
+def bench_colorize_nested():
+    pastel = Pastel(True)
+    depth = 200
+    message = "".join(
+        f"<fg={('red', 'green', 'blue')[i % 3]};options=bold>level {i} " for i in range(depth)
+    ) + "</>" * depth
+    return lambda: pastel._compile(message, True, pastel.color_depth())
+
+
+def bench_colorize_cached():
+    pastel = Pastel(True)
+    message = "<info>Done</info> in <comment>3.2s</comment>"
+    return lambda: pastel.colorize(message)
+
+
+if __name__ == "__main__":
+    from runner import main
+
+    main([__file__])
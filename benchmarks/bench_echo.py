@@ -0,0 +1,47 @@
+"""Benchmarks for `echo()` writing to a non-interactive stdout.
+
+Run with `python benchmarks/runner.py bench_echo.py`.
+"""
+import os
+import sys
+
+from proper_cli import batch, echo
+
+
+LINES = 100_000
+
+
+def _to_devnull(func):
+    def run():
+        stdout = sys.stdout
+        with open(os.devnull, "w", buffering=1) as devnull:
+            sys.stdout = devnull
+            try:
+                func()
+            finally:
+                sys.stdout = stdout
+
+    return run
+
+
+def bench_echo_lines():
+    def run():
+        for i in range(LINES):
+            echo(f"<info>line</info> {i}")
+
+    return _to_devnull(run)
+
+
+def bench_echo_lines_batched():
+    def run():
+        with batch():
+            for i in range(LINES):
+                echo(f"<info>line</info> {i}")
+
+    return _to_devnull(run)
+
+
+if __name__ == "__main__":
+    from runner import main
+
+    main([__file__])
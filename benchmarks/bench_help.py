@@ -0,0 +1,81 @@
+"""Benchmarks for the help rendering of big `Cli` trees.
+
+Run with `python benchmarks/runner.py bench_help.py`.
+"""
+import io
+
+from proper_cli import Cli, StreamSink, set_sink
+from proper_cli.registry import _registries
+
+
+def make_command(name: str):
+    def command(self, path, count=1, verbose=False):
+        """Do something useful with the path.
+
+        Arguments:
+        - path: Where.
+        - count: How many times.
+        """
+
+    command.__name__ = name
+    return command
+
+
+def make_cli(commands: int = 20, groups: int = 3, depth: int = 3, prefix: str = ""):
+    """A `Cli` class with `commands` commands and `groups` subgroups
+    at every level, up to `depth` levels."""
+    attrs = {"__doc__": f"Group {prefix or 'root'}"}
+    for i in range(commands):
+        attrs[f"cmd{i}"] = make_command(f"cmd{i}")
+    if depth > 1:
+        for i in range(groups):
+            attrs[f"group{i}"] = make_cli(commands, groups, depth - 1, f"{prefix}{i}")
+    return type(f"Group{prefix}", (Cli,), attrs)
+
+
+def _render(cli):
+    previous = set_sink(StreamSink(io.StringIO()))
+    try:
+        cli._help()
+    finally:
+        set_sink(previous)
+
+
+def bench_help_260_commands():
+    cli = make_cli()(parent="bench")
+    return lambda: _render(cli)
+
+
+def bench_help_260_commands_cold():
+    cli = make_cli()(parent="bench")
+
+    def run():
+        _registries.clear()
+        _render(cli)
+
+    return run
+
+
+def bench_help_command():
+    cli = make_cli()(parent="bench")
+    cmd = cli.cmd3
+    return lambda: _render_command(cli, cmd)
+
+
+def _render_command(cli, cmd):
+    previous = set_sink(StreamSink(io.StringIO()))
+    try:
+        cli._help_command("cmd3", cmd)
+    finally:
+        set_sink(previous)
+
+
+def bench_dispatch():
+    cli = make_cli()(parent="bench")
+    return lambda: cli._run("group1", "group2", "cmd7", "path")
+
+
+if __name__ == "__main__":
+    from runner import main
+
+    main([__file__])
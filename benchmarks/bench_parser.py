@@ -0,0 +1,73 @@
+"""Benchmarks for `parse_args()`.
+
+The time should grow linearly with the number of arguments. Running this
+file directly also prints the time per argument of each size, and fails
+if the largest one is more than `MAX_SLOWDOWN` times the smallest.
+
+Run with `python benchmarks/runner.py bench_parser.py`.
+"""
+import sys
+
+from proper_cli.parser import parse_args
+
+
+SIZES = (1_000, 10_000, 100_000, 300_000)
+MAX_SLOWDOWN = 2.0
+
+
+def make_argv(size: int) -> list[str]:
+    argv = ["process", "input.txt", "output.txt"]
+    for i in range(size):
+        if i % 4 == 0:
+            argv.append(f"--include=src/module_{i}.py")
+        elif i % 4 == 1:
+            argv.extend(["-n", str(i)])
+        elif i % 4 == 2:
+            argv.append(f"-flag{i % 50}")
+        else:
+            argv.extend(["--offset", f"-{i}"])
+    return argv
+
+
+def bench_parse_args_small():
+    argv = ["abc", "def", "-w", "3", "--foo", "bar", "-narf=zort", "-no-meh"]
+    return lambda: parse_args(argv)
+
+
+def bench_parse_args_1k():
+    argv = make_argv(1_000)
+    return lambda: parse_args(argv)
+
+
+def bench_parse_args_10k():
+    argv = make_argv(10_000)
+    return lambda: parse_args(argv)
+
+
+def bench_parse_args_100k():
+    argv = make_argv(100_000)
+    return lambda: parse_args(argv)
+
+
+def check_scaling(sizes: tuple[int, ...] = SIZES) -> bool:
+    """Print the time per argument of each size and return whether it
+    stays within `MAX_SLOWDOWN` times the fastest one."""
+    from runner import format_time, measure
+
+    costs = []
+    for size in sizes:
+        argv = make_argv(size)
+        best = measure(lambda argv=argv: lambda: parse_args(argv), repeat=3)["best"]
+        costs.append(best / len(argv))
+        print(f"{len(argv):>10} arguments {format_time(costs[-1]):>12} per argument")
+    slowdown = max(costs) / min(costs)
+    print(f"Slowest / fastest per argument: {slowdown:.2f}x")
+    return slowdown <= MAX_SLOWDOWN
+
+
+if __name__ == "__main__":
+    from runner import main
+
+    main([__file__])
+    print()
+    sys.exit(0 if check_scaling() else 1)
@@ -0,0 +1,65 @@
+"""Benchmarks for colorizing and echoing text without markup, which is
+most of what goes through `echo()`.
+
+Run with `python benchmarks/runner.py bench_plain.py`.
+"""
+import io
+
+from proper_cli import StreamSink, echo, set_sink
+from proper_cli import pastel as pastel_module
+from proper_cli.pastel import Pastel
+
+
+LINES = 10_000
+
+
+def make_lines(count: int) -> list[str]:
+    return [f"Processed item {i} of {count} in 0.{i % 10}s" for i in range(count)]
+
+
+def bench_plain_colorize_lines():
+    pastel = Pastel(True)
+    lines = make_lines(LINES)
+
+    def run():
+        for line in lines:
+            pastel.colorize(line)
+
+    return run
+
+
+def bench_plain_module_colorize_lines():
+    lines = make_lines(LINES)
+    colorize = pastel_module.colorize
+
+    def run():
+        for line in lines:
+            colorize(line)
+
+    return run
+
+
+def bench_plain_colorize_1mb():
+    pastel = Pastel(True)
+    message = "\n".join(make_lines(25_000))
+    return lambda: pastel.colorize(message)
+
+
+def bench_plain_echo_lines():
+    lines = make_lines(LINES)
+
+    def run():
+        previous = set_sink(StreamSink(io.StringIO()))
+        try:
+            for line in lines:
+                echo(line)
+        finally:
+            set_sink(previous)
+
+    return run
+
+
+if __name__ == "__main__":
+    from runner import main
+
+    main([__file__])
@@ -0,0 +1,66 @@
+"""Benchmarks for the per-item overhead of `Progress`.
+
+Compare each one with `bench_progress_baseline_*`, the same loop
+without a progress bar. The difference, divided by `ITEMS`, is the
+cost per item.
+
+Run with `python benchmarks/runner.py bench_progress.py`.
+"""
+import io
+
+from proper_cli import Progress
+
+
+ITEMS = 100_000
+
+
+def bench_progress_baseline_list():
+    items = list(range(ITEMS))
+
+    def run():
+        for _ in items:
+            pass
+
+    return run
+
+
+def bench_progress_list():
+    items = list(range(ITEMS))
+
+    def run():
+        for _ in Progress(items, stream=io.StringIO()):
+            pass
+
+    return run
+
+
+def bench_progress_baseline_generator():
+    def run():
+        for _ in (i for i in range(ITEMS)):
+            pass
+
+    return run
+
+
+def bench_progress_generator():
+    def run():
+        for _ in Progress((i for i in range(ITEMS)), total=ITEMS, stream=io.StringIO()):
+            pass
+
+    return run
+
+
+def bench_progress_update():
+    def run():
+        with Progress(total=ITEMS, stream=io.StringIO()) as bar:
+            update = bar.update
+            for _ in range(ITEMS):
+                update()
+
+    return run
+
+
+if __name__ == "__main__":
+    from runner import main
+
+    main([__file__])
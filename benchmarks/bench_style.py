@@ -0,0 +1,49 @@
+"""Benchmarks for `Style` and the 256-color and truecolor specs.
+
+Run with `python benchmarks/runner.py bench_style.py`.
+"""
+from proper_cli.pastel import Pastel
+from proper_cli.pastel.style import Style
+
+
+def bench_style_apply():
+    style = Style("light_green", "black", ["bold", "underline"])
+    return lambda: style.apply("some text")
+
+
+def bench_style_create():
+    return lambda: Style("light_green", "black", ["bold"])
+
+
+def _heatmap(rows: int = 40, cols: int = 100) -> str:
+    """A frame of cells with a different background color each."""
+    lines = []
+    for y in range(rows):
+        cells = []
+        for x in range(cols):
+            red, blue = x * 255 // cols, y * 255 // rows
+            cells.append(f"<bg=#{red:02x}40{blue:02x}> </>")
+        lines.append("".join(cells))
+    return "\n".join(lines)
+
+
+def bench_style_heatmap_truecolor():
+    pastel = Pastel(True, color_depth=2**24)
+    frame = _heatmap()
+    return lambda: pastel.colorize(frame)
+
+
+def bench_style_heatmap_16_colors():
+    pastel = Pastel(True, color_depth=16)
+    frame = _heatmap()
+    return lambda: pastel.colorize(frame)
+
+
+def bench_style_create_hex_256():
+    return lambda: Style("#ff8800", "color(17)", color_depth=256)
+
+
+if __name__ == "__main__":
+    from runner import main
+
+    main([__file__])
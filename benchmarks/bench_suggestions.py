@@ -0,0 +1,101 @@
+"""Benchmarks for the "Did you mean?" suggestions of unknown commands.
+
+Compare `bench_suggestions_lookup` with `bench_suggestions_full_scan`,
+the same lookup comparing the name with every command. A lookup should
+stay under a millisecond, even for each of the five names of
+`bench_suggestions_crowded`, that are close to many others.
+
+Run with `python benchmarks/runner.py bench_suggestions.py`.
+"""
+import io
+import random
+
+from proper_cli import Cli, StreamSink, set_sink
+from proper_cli.registry import _registries
+from proper_cli.suggestions import edit_distance, get_max_distance, get_suggestions
+
+
+WORDS = [
+    "add", "backup", "build", "cache", "check", "clean", "clear", "config",
+    "create", "db", "delete", "deploy", "diff", "disable", "dump", "enable",
+    "export", "fetch", "flush", "generate", "group", "import", "index", "init",
+    "install", "key", "list", "load", "lock", "log", "merge", "migrate",
+    "new", "publish", "purge", "queue", "rebuild", "release", "reload",
+    "remove", "rename", "reset", "restore", "role", "rotate", "run", "schema",
+    "seed", "serve", "show", "start", "status", "stop", "sync", "tag", "test",
+    "token", "update", "upgrade", "user", "validate", "worker",
+]
+
+
+def make_names(count: int, rand: random.Random) -> list[str]:
+    names: set[str] = set()
+    while len(names) < count:
+        names.add("_".join(rand.sample(WORDS, rand.randint(1, 2))))
+    return sorted(names)
+
+
+def make_cli(commands: int = 100, groups: int = 4, depth: int = 3, seed: int = 0):
+    """A `Cli` class with about a thousand commands with realistic names."""
+    rand = random.Random(seed)
+    attrs = {name: (lambda self: None) for name in make_names(commands, rand)}
+    if depth > 1:
+        for i, name in enumerate(make_names(groups, rand)):
+            attrs[name] = make_cli(commands, groups, depth - 1, seed * 10 + i + 1)
+    return type("Group", (Cli,), attrs)
+
+
+def bench_suggestions_build_index():
+    cls = make_cli()
+
+    def run():
+        _registries.pop(cls, None)
+        get_suggestions(cls, "migrat")
+
+    return run
+
+
+def bench_suggestions_lookup():
+    cls = make_cli()
+    get_suggestions(cls, "migrat")
+    return lambda: get_suggestions(cls, "cahce_clear")
+
+
+def bench_suggestions_crowded():
+    cls = make_cli()
+    get_suggestions(cls, "migrat")
+    names = ["serve_status", "stauts_sync", "cache_clera", "nwe", "delete_tset"]
+
+    def run():
+        for name in names:
+            get_suggestions(cls, name)
+
+    return run
+
+
+def bench_suggestions_full_scan():
+    cls = make_cli()
+    get_suggestions(cls, "migrat")
+    _, paths = _registries[cls].suggestions
+    keys = list(paths)
+    name = "cahce_clear"
+    max_distance = get_max_distance(name)
+    return lambda: [key for key in keys if edit_distance(name, key) <= max_distance]
+
+
+def bench_suggestions_not_found():
+    cli = make_cli()(parent="bench")
+
+    def run():
+        previous = set_sink(StreamSink(io.StringIO()))
+        try:
+            cli._command_not_found("cahce_clear")
+        finally:
+            set_sink(previous)
+
+    return run
+
+
+if __name__ == "__main__":
+    from runner import main
+
+    main([__file__])
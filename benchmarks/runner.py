@@ -0,0 +1,135 @@
+"""Run the benchmarks and compare them against a stored baseline.
+
+Every `bench_*.py` module in this folder defines `bench_*()` functions.
+Each one prepares its workload and returns the callable to time.
+
+    python benchmarks/runner.py                      # run everything
+    python benchmarks/runner.py -k colorize          # only matching names
+    python benchmarks/runner.py --output results.json
+    python benchmarks/runner.py --save-baseline baseline.json
+    python benchmarks/runner.py --baseline baseline.json --threshold 0.15
+
+With `--baseline`, the exit code is 1 if any benchmark is slower than the
+baseline by more than the threshold (a fraction, 0.1 = 10%).
+"""
+import argparse
+import importlib
+import json
+import platform
+import statistics
+import sys
+import timeit
+import typing as t
+from pathlib import Path
+
+
+HERE = Path(__file__).parent
+
+
+def discover(paths: t.Sequence[str] = (), pattern: str = "") -> dict[str, t.Callable]:
+    if str(HERE) not in sys.path:
+        sys.path.insert(0, str(HERE))
+
+    files = [Path(path) for path in paths] or sorted(HERE.glob("bench_*.py"))
+    benches = {}
+    for path in files:
+        module = importlib.import_module(path.stem)
+        for name, func in vars(module).items():
+            if not name.startswith("bench_") or not callable(func):
+                continue
+            full_name = f"{path.stem}.{name}"
+            if pattern and pattern not in full_name:
+                continue
+            benches[full_name] = func
+    return benches
+
+
+def measure(setup: t.Callable, repeat: int) -> dict[str, float]:
+    timer = timeit.Timer(setup())
+    loops, _ = timer.autorange()
+    times = [elapsed / loops for elapsed in timer.repeat(repeat, loops)]
+    return {
+        "best": min(times),
+        "median": statistics.median(times),
+        "loops": loops,
+    }
+
+
+def compare(
+    results: dict[str, dict],
+    baseline: dict[str, dict],
+    threshold: float,
+) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        ratio = result["best"] / base["best"]
+        result["ratio"] = round(ratio, 3)
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return regressions
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
+
+
+def main(argv: t.Optional[t.Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the proper-cli benchmarks.")
+    parser.add_argument("files", nargs="*", help="Benchmark modules to run")
+    parser.add_argument("-k", dest="pattern", default="", help="Filter by name")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against this JSON file")
+    parser.add_argument("--save-baseline", help="Write the results as a baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Allowed slowdown against the baseline (default: 0.1 = 10%%)",
+    )
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.baseline:
+        path = Path(args.baseline)
+        if path.exists():
+            baseline = json.loads(path.read_text())["results"]
+        else:
+            print(f"Baseline {path} not found, skipping the comparison.")
+
+    results = {}
+    for name, setup in discover(args.files, args.pattern).items():
+        results[name] = result = measure(setup, args.repeat)
+        print(f"{name:<50} {format_time(result['best']):>12}", flush=True)
+
+    regressions = compare(results, baseline, args.threshold)
+    data = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            Path(path).write_text(json.dumps(data, indent=2) + "\n")
+
+    if baseline:
+        print()
+        for name, result in results.items():
+            if "ratio" in result:
+                mark = "  SLOWER" if name in regressions else ""
+                print(f"{name:<50} {result['ratio']:>8.2f}x{mark}")
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
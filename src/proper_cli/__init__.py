@@ -1,2 +1,59 @@
-from .helpers import *  # noqa
-from .main import *  # noqa
+import importlib
+import typing as t
+
+
+if t.TYPE_CHECKING:
+    from .helpers import *  # noqa
+    from .live import *  # noqa
+    from .main import *  # noqa
+    from .output import *  # noqa
+
+
+# The public names are imported the first time they are used, so importing
+# a submodule, like `proper_cli.server` in a client, doesn't import them all.
+_EXPORTS = {
+    # helpers
+    "ask": "helpers",
+    "confirm": "helpers",
+    "progress": "helpers",
+    "Progress": "helpers",
+    "YES_CHOICES": "helpers",
+    "NO_CHOICES": "helpers",
+    # live
+    "LiveRegion": "live",
+    # main
+    "echo": "main",
+    "echo_stream": "main",
+    "add_style": "main",
+    "batchable": "main",
+    "Cli": "main",
+    "LazyGroup": "main",
+    # output
+    "batch": "output",
+    "capture": "output",
+    "BufferedSink": "output",
+    "StreamSink": "output",
+    "get_sink": "output",
+    "set_sink": "output",
+}
+
+__all__ = tuple(_EXPORTS)
+
+
+def __getattr__(name: str) -> t.Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        # Submodules were also available as attributes of the package
+        try:
+            return importlib.import_module(f"{__name__}.{name}")
+        except ModuleNotFoundError as error:
+            if error.name != f"{__name__}.{name}":
+                raise
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,130 @@
+"""Run the `async def` commands of a `Cli` in an event loop.
+
+The whole invocation uses a single event loop, created by the
+`_loop_factory` of the `Cli` (eg: `uvloop.new_event_loop`) or by
+`asyncio.new_event_loop()`. Ctrl+C and SIGTERM cancel the command,
+so its `finally` blocks and `async with` exits run before the program
+exits with the usual `KeyboardInterrupt` or `SystemExit(1)`.
+
+`asyncio` is only imported when an `async def` command runs, so the
+programs, or the commands, that don't use it don't pay for importing it.
+"""
+import signal
+import threading
+import typing as t
+from contextlib import asynccontextmanager
+
+
+if t.TYPE_CHECKING:
+    import asyncio
+
+
+__all__ = ("run_async", "null_lifespan")
+
+LoopFactory = t.Callable[[], "asyncio.AbstractEventLoop"]
+
+
+@asynccontextmanager
+async def null_lifespan() -> t.AsyncIterator[None]:
+    yield
+
+
+def run_async(main: t.Coroutine, loop_factory: t.Optional[LoopFactory] = None) -> t.Any:
+    """Run the coroutine `main` in a new event loop and close the loop
+    after cancelling the tasks still pending.
+
+    Like `asyncio.run()` (or `asyncio.Runner` in Python 3.11+) but it
+    also works in Python 3.9 and cancels `main` on SIGTERM.
+    """
+    import asyncio
+
+    loop = (loop_factory or asyncio.new_event_loop)()
+    task = None
+    try:
+        asyncio.set_event_loop(loop)
+        task = loop.create_task(main)
+        with _Interrupts(loop, task) as interrupts:
+            try:
+                return loop.run_until_complete(task)
+            except asyncio.CancelledError:
+                if interrupts.sigterm:
+                    raise SystemExit(1) from None
+                if interrupts.sigint:
+                    raise KeyboardInterrupt() from None
+                raise
+    finally:
+        if task is None:
+            main.close()
+        try:
+            _cancel_all_tasks(loop)
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.run_until_complete(loop.shutdown_default_executor())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+
+class _Interrupts:
+    """Cancel the task on Ctrl+C or SIGTERM instead of raising inside
+    whatever the loop happens to be running at the moment."""
+
+    def __init__(self, loop: "asyncio.AbstractEventLoop", task: "asyncio.Task") -> None:
+        self.loop = loop
+        self.task = task
+        self.sigint = False
+        self.sigterm = False
+        self._previous_sigint: t.Any = None
+        self._previous_sigterm: t.Any = None
+
+    def __enter__(self) -> "_Interrupts":
+        if threading.current_thread() is not threading.main_thread():
+            return self
+
+        if signal.getsignal(signal.SIGINT) is signal.default_int_handler:
+            self._previous_sigint = signal.signal(signal.SIGINT, self._on_sigint)
+        previous_sigterm = signal.getsignal(signal.SIGTERM)
+        try:
+            self.loop.add_signal_handler(signal.SIGTERM, self._on_sigterm)
+            self._previous_sigterm = previous_sigterm
+        except (NotImplementedError, RuntimeError, ValueError):
+            # Windows: the SIGTERM handler of the `Cli` still applies
+            pass
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._previous_sigint is not None:
+            signal.signal(signal.SIGINT, self._previous_sigint)
+        if self._previous_sigterm is not None:
+            # `remove_signal_handler()` resets it to SIG_DFL
+            self.loop.remove_signal_handler(signal.SIGTERM)
+            signal.signal(signal.SIGTERM, self._previous_sigterm)
+
+    def _on_sigint(self, signum, frame) -> None:
+        if self.sigint or self.task.done():
+            # Pressed again while the command was cleaning up
+            raise KeyboardInterrupt()
+        self.sigint = True
+        self.loop.call_soon_threadsafe(self.task.cancel)
+
+    def _on_sigterm(self) -> None:
+        self.sigterm = True
+        self.task.cancel()
+
+
+def _cancel_all_tasks(loop: "asyncio.AbstractEventLoop") -> None:
+    import asyncio
+
+    pending = asyncio.all_tasks(loop)
+    if not pending:
+        return
+    for task in pending:
+        task.cancel()
+    loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+    for task in pending:
+        if task.cancelled() or task.exception() is None:
+            continue
+        loop.call_exception_handler({
+            "message": "unhandled exception during the shutdown of the loop",
+            "exception": task.exception(),
+            "task": task,
+        })
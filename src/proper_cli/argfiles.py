@@ -0,0 +1,99 @@
+"""Expand `@path` arguments with the arguments listed in that file.
+
+The arguments in the file are separated by spaces or newlines. Use
+quotes or backslashes for arguments that contain spaces:
+
+    resize
+    "my photo.jpg" other\\ photo.jpg
+    --quality=80
+
+`@-` reads the arguments from stdin. A `@something` argument that is not
+the path of an existing file is passed as it is.
+"""
+import mmap
+import os
+import re
+import stat
+import sys
+import typing as t
+
+
+__all__ = ("expand_argfiles", "read_argfile")
+
+STDIN_ARG = "@-"
+
+TOKEN_RE = re.compile(
+    rb"""(?:"(?:[^"\\]|\\.)*"|'[^']*'|\\.|[^\s"'\\]|["'\\])+""",
+    re.DOTALL,
+)
+PART_RE = re.compile(
+    rb""""((?:[^"\\]|\\.)*)"|'([^']*)'|\\(.)|([^"'\\]+|["'\\])""",
+    re.DOTALL,
+)
+ESCAPED_RE = re.compile(rb"\\(.)", re.DOTALL)
+SPECIAL_RE = re.compile(rb"""["'\\]""")
+
+
+def expand_argfiles(cliargs: t.Iterable[str]) -> t.Iterator[str]:
+    """Yield the arguments, replacing the `@path` ones with the arguments
+    read from that file. The files are not read until they are reached.
+    """
+    for arg in cliargs:
+        if arg == STDIN_ARG:
+            yield from _read_fileno(sys.stdin.fileno())
+        elif arg[:1] == "@" and os.path.isfile(arg[1:]):
+            yield from read_argfile(arg[1:])
+        else:
+            yield arg
+
+
+def read_argfile(path: t.Union[str, os.PathLike]) -> t.Iterator[str]:
+    """Yield the arguments in the file at `path`, one by one.
+
+    The file is memory-mapped instead of read, so even a huge file is
+    never copied as a whole.
+    """
+    with open(path, "rb") as fp:
+        data = _map(fp.fileno())
+    yield from _tokenize(data)
+
+
+def _read_fileno(fileno: int) -> t.Iterator[str]:
+    if stat.S_ISREG(os.fstat(fileno).st_mode):
+        data = _map(fileno)
+    else:
+        # A pipe or a terminal can't be memory-mapped
+        with os.fdopen(os.dup(fileno), "rb") as fp:
+            data = fp.read()
+    yield from _tokenize(data)
+
+
+def _map(fileno: int) -> t.Union[mmap.mmap, bytes]:
+    if not os.fstat(fileno).st_size:
+        return b""
+    # The map stays valid after the file is closed and is released
+    # when the tokenizer is done with it.
+    return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+
+
+def _tokenize(data: t.Union[mmap.mmap, bytes]) -> t.Iterator[str]:
+    for match in TOKEN_RE.finditer(data):
+        yield _unquote(match.group())
+
+
+def _unquote(token: bytes) -> str:
+    if not SPECIAL_RE.search(token):
+        return os.fsdecode(token)
+
+    parts = []
+    for match in PART_RE.finditer(token):
+        double, single, escaped, plain = match.groups()
+        if double is not None:
+            parts.append(ESCAPED_RE.sub(rb"\1", double))
+        elif single is not None:
+            parts.append(single)
+        elif escaped is not None:
+            parts.append(escaped)
+        else:
+            parts.append(plain)
+    return os.fsdecode(b"".join(parts))
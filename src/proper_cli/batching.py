@@ -0,0 +1,194 @@
+"""Run a command once for each of its positional arguments, in parallel.
+
+    class Manage(Cli):
+        @batchable
+        def resize(self, path, quality=80):
+            ...
+
+    $ manage resize *.jpg --quality=60 --jobs=8
+
+What each run echoes is written in one piece when it finishes, so the
+lines of different runs never interleave. The runs that fail are listed
+at the end and the exit code is 1.
+
+The runs of an `async def` command are tasks of the event loop of the
+invocation instead, at most `--jobs` at the same time, so `_lifespan()`
+runs once for all of them.
+"""
+import inspect
+import os
+import traceback
+import typing as t
+
+from .output import capture
+
+
+if t.TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+
+
+__all__ = ("batchable",)
+
+BATCH_ATTR = "__proper_cli_batch__"
+JOBS_OPT = "jobs"
+
+
+class Batch:
+    __slots__ = ("jobs", "processes")
+
+    def __init__(self, jobs: t.Optional[int], processes: bool) -> None:
+        self.jobs = jobs
+        self.processes = processes
+
+
+class Result:
+    __slots__ = ("item", "code", "output", "error")
+
+    def __init__(self, item: t.Any, code: int, output: str, error: str) -> None:
+        self.item = item
+        self.code = code
+        self.output = output
+        self.error = error
+
+
+def batchable(
+    func: t.Optional[t.Callable] = None,
+    *,
+    jobs: t.Optional[int] = None,
+    processes: bool = False,
+) -> t.Any:
+    """Mark a command that takes one positional argument to run once per
+    positional argument, in a pool of threads (or processes) of `--jobs`
+    workers.
+
+    Arguments:
+    - jobs (int): Default number of workers. By default, the number of CPUs.
+    - processes (bool): Use processes instead of threads, for CPU-bound
+      commands. The `Cli` and the arguments must be picklable. Not
+      available for `async def` commands.
+
+    """
+
+    def decorate(func: t.Callable) -> t.Callable:
+        if processes and inspect.iscoroutinefunction(func):
+            raise TypeError(
+                f"`{func.__name__}` is an `async def` command: its runs are tasks "
+                "of the event loop of the invocation, not processes."
+            )
+        setattr(func, BATCH_ATTR, Batch(jobs, processes))
+        return func
+
+    if func is not None:
+        return decorate(func)
+    return decorate
+
+
+def get_batch(cmd: t.Callable) -> t.Optional[Batch]:
+    return getattr(cmd, BATCH_ATTR, None)
+
+
+def get_jobs(batch: Batch, value: t.Any) -> int:
+    """Validate the value of the `--jobs` option."""
+    if value is None or value is True:
+        return batch.jobs or os.cpu_count() or 1
+    try:
+        jobs = int(value)
+    except (TypeError, ValueError):
+        jobs = 0
+    if jobs < 1:
+        raise ValueError(f"`--{JOBS_OPT}` must be a positive integer, not {value!r}")
+    return jobs
+
+
+def run_batch(
+    cmd: t.Callable,
+    items: t.Sequence[t.Any],
+    opts: dict[str, t.Any],
+    jobs: int,
+    processes: bool = False,
+) -> t.Iterator[Result]:
+    """Run `cmd(item, **opts)` for every item and yield the results
+    in the order they finish."""
+    jobs = min(jobs, len(items))
+    if jobs <= 1:
+        for item in items:
+            yield run_item(cmd, item, opts)
+        return
+
+    from concurrent.futures import (
+        ProcessPoolExecutor,
+        ThreadPoolExecutor,
+        as_completed,
+    )
+
+    pool_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    executor: "Executor" = pool_class(max_workers=jobs)
+    try:
+        futures: "list[Future]" = [
+            executor.submit(run_item, cmd, item, opts) for item in items
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        # On Ctrl+C or an error, don't start the remaining items
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+async def run_batch_async(
+    cmd: t.Callable,
+    items: t.Sequence[t.Any],
+    opts: dict[str, t.Any],
+    jobs: int,
+) -> t.AsyncIterator[Result]:
+    """Run the `async def` command `cmd(item, **opts)` for every item, as
+    tasks of the running event loop, and yield the results in the order
+    they finish. At most `jobs` of them run at the same time."""
+    import asyncio
+
+    semaphore = asyncio.Semaphore(jobs)
+
+    async def run(item: t.Any) -> Result:
+        async with semaphore:
+            return await run_item_async(cmd, item, opts)
+
+    tasks = [asyncio.ensure_future(run(item)) for item in items]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # On Ctrl+C or an error, don't start the remaining items
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def run_item(cmd: t.Callable, item: t.Any, opts: dict[str, t.Any]) -> Result:
+    code, error = 0, ""
+    with capture() as buffer:
+        try:
+            cmd(item, **opts)
+        except (SystemExit, Exception) as exc:
+            code, error = _get_failure(exc)
+    return Result(item, code, buffer.getvalue(), error)
+
+
+async def run_item_async(
+    cmd: t.Callable, item: t.Any, opts: dict[str, t.Any]
+) -> Result:
+    code, error = 0, ""
+    # Each task has its own context, so this only captures this item
+    with capture() as buffer:
+        try:
+            await cmd(item, **opts)
+        except (SystemExit, Exception) as exc:
+            code, error = _get_failure(exc)
+    return Result(item, code, buffer.getvalue(), error)
+
+
+def _get_failure(exc: BaseException) -> tuple[int, str]:
+    """Return the exit code and the error message of a failed run."""
+    if isinstance(exc, SystemExit):
+        if exc.code is None or isinstance(exc.code, int):
+            return exc.code or 0, ""
+        return 1, str(exc.code)
+    return 1, traceback.format_exc().rstrip()
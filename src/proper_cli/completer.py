@@ -0,0 +1,111 @@
+"""Answer a shell completion request from a precomputed command index.
+
+This file is run directly by the completion scripts of the shells, as
+`python -S -E completer.py INDEX SHELL CWORD WORDS...`, so it must only
+use the standard library and never import `proper_cli` or the program:
+a Tab press only costs the start-up of a bare Python interpreter.
+
+If a source file of the program changed since the index was built, the
+program is run once with `PROPER_CLI_COMPLETION=index` to rebuild it.
+"""
+import json
+import os
+import subprocess
+import sys
+
+
+COMPLETION_ENV = "PROPER_CLI_COMPLETION"
+
+
+def load_index(path):
+    try:
+        with open(path, encoding="utf8") as fp:
+            index = json.load(fp)
+    except (OSError, ValueError):
+        index = None
+
+    if index is None or not is_fresh(index.get("files", {})):
+        index = rebuild(path, index)
+    return index
+
+
+def is_fresh(files):
+    for path, mtime in files.items():
+        try:
+            if os.stat(path).st_mtime_ns != mtime:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def rebuild(path, index):
+    run = (index or {}).get("run")
+    if not run:
+        return index
+    env = dict(os.environ, **{COMPLETION_ENV: "index"})
+    try:
+        subprocess.run(
+            run,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=30,
+            check=True,
+        )
+        with open(path, encoding="utf8") as fp:
+            return json.load(fp)
+    except (OSError, ValueError, subprocess.SubprocessError):
+        # Better a stale index than nothing
+        return index
+
+
+def complete(index, words, cword):
+    """Return the `(name, summary)` candidates for `words[cword]`."""
+    node = index["tree"]
+    for word in words[1:cword]:
+        if word.startswith("-"):
+            continue
+        if "commands" not in node:
+            # An argument of the command
+            continue
+        node = node["commands"].get(word)
+        if node is None:
+            return []
+
+    current = words[cword] if cword < len(words) else ""
+    if current.startswith("-"):
+        candidates = [(option, "") for option in node.get("options", [])]
+    elif "commands" in node:
+        candidates = [
+            (name, child.get("summary", ""))
+            for name, child in node["commands"].items()
+        ]
+    else:
+        # Let the shell complete the arguments, eg: as paths
+        candidates = []
+    return [(name, summary) for name, summary in candidates if name.startswith(current)]
+
+
+def format_candidates(candidates, shell):
+    if shell == "zsh":
+        return [
+            name.replace(":", "\\:") + (f":{summary}" if summary else "")
+            for name, summary in candidates
+        ]
+    if shell == "fish":
+        return [f"{name}\t{summary}" if summary else name for name, summary in candidates]
+    return [name for name, _ in candidates]
+
+
+def main(argv):
+    index_path, shell, cword, *words = argv
+    index = load_index(index_path)
+    if not index:
+        return
+    for line in format_candidates(complete(index, words, int(cword)), shell):
+        sys.stdout.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,170 @@
+"""Shell completion for bash, zsh and fish.
+
+Add the output of running the program with `PROPER_CLI_COMPLETION` set to
+the name of your shell to its configuration, eg: for bash
+
+    eval "$(PROPER_CLI_COMPLETION=bash manage)"
+
+That also writes an index of the commands, their options and summaries
+to the cache directory. The completion script only reads that index with
+`completer.py`, without importing the program, and rebuilds it when one
+of the source files of the program changes.
+"""
+import hashlib
+import inspect
+import json
+import os
+import shlex
+import sys
+import typing as t
+from pathlib import Path
+
+from .batching import JOBS_OPT, get_batch
+from .help_cache import get_cache_dir, get_source_files
+from .parser import NEGATIVE_FLAG_PREFIX
+
+
+if t.TYPE_CHECKING:
+    from .main import Cli
+
+
+__all__ = ("COMPLETION_ENV", "SHELLS", "build_index", "get_index_path", "get_script")
+
+COMPLETION_ENV = "PROPER_CLI_COMPLETION"
+HELP_OPTION = "--help"
+COMPLETER = Path(__file__).with_name("completer.py")
+
+BASH_SCRIPT = """\
+_proper_cli_{func}() {{
+    local IFS=$'\\n'
+    COMPREPLY=($({python} -S -E {completer} {index} bash "$COMP_CWORD" "${{COMP_WORDS[@]}}"))
+    if [[ ${{#COMPREPLY[@]}} -eq 1 && $COMPREPLY == *= ]]; then
+        compopt -o nospace
+    fi
+}}
+complete -o default -F _proper_cli_{func} {prog}
+"""
+
+ZSH_SCRIPT = """\
+_proper_cli_{func}() {{
+    local -a candidates
+    candidates=("${{(@f)$({python} -S -E {completer} {index} zsh $((CURRENT - 1)) "${{words[@]}}")}}")
+    if [[ -n "$candidates" ]]; then
+        _describe -t commands '{prog}' candidates
+    else
+        _files
+    fi
+}}
+compdef _proper_cli_{func} {prog}
+"""
+
+FISH_SCRIPT = """\
+function __proper_cli_{func}
+    set -l words (commandline -opc) (commandline -ct)
+    {python} -S -E {completer} {index} fish (math (count $words) - 1) $words
+end
+complete -c {prog} -f -a '(__proper_cli_{func})'
+"""
+
+SHELLS = {"bash": BASH_SCRIPT, "zsh": ZSH_SCRIPT, "fish": FISH_SCRIPT}
+
+
+def run(cli: "Cli", mode: str) -> None:
+    """Write the index and, unless `mode` is "index", print the completion
+    script for the shell `mode`."""
+    mode = mode.strip().lower()
+    if mode != "index" and mode not in SHELLS:
+        raise SystemExit(
+            f"Unknown shell {mode!r} in {COMPLETION_ENV}. "
+            f"Use one of: {', '.join(SHELLS)}."
+        )
+    path = write_index(cli)
+    if mode != "index":
+        sys.stdout.write(get_script(mode, path))
+
+
+def get_index_path(prog: t.Optional[str] = None) -> Path:
+    """Return where the index of the program running now is stored."""
+    script = os.path.abspath(sys.argv[0])
+    prog = prog or Path(script).name
+    digest = hashlib.sha1(f"{sys.executable}\n{script}".encode("utf8")).hexdigest()
+    return get_cache_dir() / f"completion-{prog}-{digest[:12]}.json"
+
+
+def write_index(cli: "Cli") -> Path:
+    path = get_index_path()
+    index = {
+        "tree": build_index(cli),
+        # Read after building it, so the lazy groups have been imported
+        "files": get_source_files(type(cli)),
+        "run": [sys.executable, os.path.abspath(sys.argv[0])],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(index), encoding="utf8")
+    os.replace(tmp, path)
+    return path
+
+
+def get_script(shell: str, index_path: t.Union[str, Path]) -> str:
+    prog = Path(sys.argv[0]).name
+    return SHELLS[shell].format(
+        func="".join(char if char.isalnum() else "_" for char in prog),
+        prog=shlex.quote(prog),
+        python=shlex.quote(sys.executable),
+        completer=shlex.quote(str(COMPLETER)),
+        index=shlex.quote(str(index_path)),
+    )
+
+
+def build_index(cli: "Cli") -> dict[str, t.Any]:
+    """Return the tree of commands of `cli`, with the options and the
+    summary of each one."""
+    registry = cli._registry
+    commands: dict[str, t.Any] = {}
+
+    for name in registry.commands:
+        cmd = getattr(cli, name, None)
+        if cmd is None:
+            continue
+        commands[name] = {
+            "summary": _summary(cmd),
+            "options": get_options(cmd),
+        }
+
+    for name, group in registry.subgroups.items():
+        subgroup = cli._init_subgroup(name, group)
+        node = build_index(subgroup)
+        node["summary"] = _summary(subgroup)
+        commands[name] = node
+
+    return {"commands": commands, "options": [HELP_OPTION]}
+
+
+def get_options(cmd: t.Callable) -> list[str]:
+    """Return the options of `cmd`: `--name=` for the ones that take a
+    value and `--name`/`--no-name` for the flags."""
+    options = []
+    try:
+        params = inspect.signature(cmd).parameters.values()
+    except (TypeError, ValueError):
+        params = []
+    for param in params:
+        if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD, param.POSITIONAL_ONLY):
+            continue
+        if param.default is param.empty:
+            continue
+        if param.default is True or param.default is False:
+            options.append(f"--{param.name}")
+            options.append(f"--{NEGATIVE_FLAG_PREFIX}{param.name}")
+        else:
+            options.append(f"--{param.name}=")
+    if get_batch(cmd) is not None:
+        options.append(f"--{JOBS_OPT}=")
+    options.append(HELP_OPTION)
+    return options
+
+
+def _summary(obj: t.Any) -> str:
+    doc = obj.__doc__ or ""
+    return doc.strip().split("\n")[0]
@@ -0,0 +1,193 @@
+import inspect
+import types
+import typing as t
+from collections import abc
+from decimal import Decimal
+from pathlib import Path
+
+from .helpers import NO_CHOICES, YES_CHOICES
+
+
+__all__ = ("CONVERTERS", "ConversionError", "Plan", "build_plan")
+
+Converter = t.Callable[[t.Any], t.Any]
+UnionType = getattr(types, "UnionType", None)
+
+
+def to_bool(value: str) -> bool:
+    text = value.lower()
+    if text in YES_CHOICES:
+        return True
+    if text in NO_CHOICES:
+        return False
+    raise ValueError(f"expected one of {', '.join(YES_CHOICES + NO_CHOICES)}")
+
+
+# Types that can be used as the annotation of a command argument.
+# Add your own types here to make them available to every command.
+CONVERTERS: dict[t.Any, Converter] = {
+    int: int,
+    float: float,
+    bool: to_bool,
+    Decimal: Decimal,
+    Path: Path,
+}
+
+LIST_TYPES = (list, tuple, set, frozenset, abc.Sequence, abc.Iterable)
+
+
+class ConversionError(ValueError):
+    def __init__(self, name: str, value: t.Any, error: Exception) -> None:
+        self.name = name
+        self.value = value
+        super().__init__(f"Invalid value for `{name}`: {value!r} ({error})")
+
+
+class Plan:
+    """The converters of the arguments of a command.
+
+    It is built once per command with `build_plan()` and then applied
+    to the values parsed from the command line on every call.
+    """
+
+    __slots__ = ("positional", "var_positional", "keywords", "var_keyword")
+
+    def __init__(self) -> None:
+        self.positional: list[tuple[str, t.Optional[Converter]]] = []
+        self.var_positional: t.Optional[tuple[str, Converter]] = None
+        self.keywords: dict[str, Converter] = {}
+        self.var_keyword: t.Optional[tuple[str, Converter]] = None
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.keywords
+            or self.var_positional
+            or self.var_keyword
+            or any(conv for _, conv in self.positional)
+        )
+
+    def apply(
+        self,
+        args: t.Sequence[t.Any],
+        opts: dict[str, t.Any],
+    ) -> tuple[list[t.Any], dict[str, t.Any]]:
+        args = list(args)
+        npos = len(self.positional)
+        for i, value in enumerate(args):
+            if i < npos:
+                name, conv = self.positional[i]
+            elif self.var_positional:
+                name, conv = self.var_positional
+            else:
+                break
+            if conv is not None:
+                args[i] = _convert(name, conv, value)
+
+        if opts:
+            opts = dict(opts)
+            for name, value in opts.items():
+                conv = self.keywords.get(name)
+                if conv is None and self.var_keyword:
+                    conv = self.var_keyword[1]
+                if conv is not None:
+                    opts[name] = _convert(name, conv, value)
+
+        return args, opts
+
+
+def build_plan(cmd: t.Callable) -> Plan:
+    """Build the converters of the arguments of `cmd` from their type
+    annotations or, if they have none, from the type of their defaults.
+    """
+    plan = Plan()
+    try:
+        sig = inspect.signature(cmd)
+    except (TypeError, ValueError):
+        return plan
+    try:
+        hints = t.get_type_hints(cmd)
+    except Exception:
+        hints = {}
+
+    for name, param in sig.parameters.items():
+        annotation = hints.get(name, param.annotation)
+        conv = get_converter(annotation, param.default)
+
+        if param.kind == param.VAR_POSITIONAL:
+            if conv is not None:
+                plan.var_positional = (name, conv)
+            continue
+        if param.kind == param.VAR_KEYWORD:
+            if conv is not None:
+                plan.var_keyword = (name, conv)
+            continue
+        if param.kind in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD):
+            plan.positional.append((name, conv))
+        if conv is not None and param.kind != param.POSITIONAL_ONLY:
+            plan.keywords[name] = conv
+
+    return plan
+
+
+def get_converter(
+    annotation: t.Any,
+    default: t.Any = inspect.Parameter.empty,
+) -> t.Optional[Converter]:
+    if annotation is inspect.Parameter.empty:
+        if default is None or default is inspect.Parameter.empty:
+            return None
+        return CONVERTERS.get(type(default))
+
+    origin = t.get_origin(annotation)
+    if origin is t.Union or (UnionType and origin is UnionType):
+        members = [arg for arg in t.get_args(annotation) if arg is not type(None)]
+        if len(members) != 1:
+            return None
+        return get_converter(members[0])
+
+    if annotation in LIST_TYPES or origin in LIST_TYPES:
+        item_args = t.get_args(annotation)
+        item_conv = get_converter(item_args[0]) if item_args else None
+        return ListConverter(item_conv)
+
+    try:
+        return CONVERTERS.get(annotation)
+    except TypeError:  # Unhashable annotation
+        return None
+
+
+class ListConverter:
+    """Converts a repeated option, or a single value, to a list."""
+
+    __slots__ = ("item",)
+
+    def __init__(self, item: t.Optional[Converter]) -> None:
+        self.item = item
+
+    def __call__(self, value: t.Any) -> list:
+        values = value if isinstance(value, list) else [value]
+        if self.item is None:
+            return list(values)
+        return [convert(self.item, item) for item in values]
+
+
+def convert(conv: Converter, value: t.Any) -> t.Any:
+    if isinstance(conv, ListConverter):
+        return conv(value)
+    if isinstance(value, list):
+        return [convert(conv, item) for item in value]
+    # Flags are already booleans, but only a boolean argument can be one
+    if isinstance(value, bool):
+        if conv is to_bool:
+            return value
+        raise ValueError("expected a value, not a flag")
+    if not isinstance(value, str):
+        return value
+    return conv(value)
+
+
+def _convert(name: str, conv: Converter, value: t.Any) -> t.Any:
+    try:
+        return convert(conv, value)
+    except (TypeError, ValueError, ArithmeticError) as error:
+        raise ConversionError(name, value, error) from None
@@ -0,0 +1,152 @@
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import typing as t
+from pathlib import Path
+
+from .registry import LazyGroup, get_registry
+
+
+CACHE_DIR_ENV = "PROPER_CLI_CACHE_DIR"
+
+
+def get_cache_dir() -> Path:
+    """Return the directory where proper_cli stores its caches.
+
+    It can be set with the `PROPER_CLI_CACHE_DIR` environment variable,
+    otherwise is `$XDG_CACHE_HOME/proper-cli` or `~/.cache/proper-cli`.
+    """
+    path = os.environ.get(CACHE_DIR_ENV)
+    if path:
+        return Path(path)
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg) if xdg else Path.home() / ".cache"
+    return base / "proper-cli"
+
+
+def iter_tree(cls: type) -> t.Iterator[t.Union[type, LazyGroup]]:
+    """Yield the `Cli` class `cls` and all its subgroups, recursively.
+
+    Lazy subgroups that haven't been imported yet are yielded
+    as they are, without importing them.
+    """
+    seen = set()
+    pending: list[t.Union[type, LazyGroup]] = [cls]
+    while pending:
+        group = pending.pop()
+        if isinstance(group, LazyGroup) and group.resolved:
+            group = group.resolve()
+        if id(group) in seen:
+            continue
+        seen.add(id(group))
+        yield group
+        if not isinstance(group, LazyGroup):
+            pending.extend(get_registry(group).subgroups.values())
+
+
+def get_source_files(cls: type) -> dict[str, int]:
+    """Return the paths and modification times of the files where the
+    classes in the tree of `cls` are defined.
+    """
+    # The help is rendered by proper_cli too
+    paths = {str(Path(__file__).with_name("main.py"))}
+    for group in iter_tree(cls):
+        if isinstance(group, LazyGroup):
+            try:
+                spec = importlib.util.find_spec(group.module)
+            except (ImportError, ValueError):
+                spec = None
+            path = spec.origin if spec else None
+        else:
+            module = sys.modules.get(group.__module__)
+            path = getattr(module, "__file__", None)
+        if path:
+            paths.add(path)
+
+    files = {}
+    for path in sorted(paths):
+        try:
+            files[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            files[path] = 0
+    return files
+
+
+def is_fresh(files: dict[str, int]) -> bool:
+    """Check that none of the `files` has changed."""
+    for path, mtime in files.items():
+        try:
+            if os.stat(path).st_mtime_ns != mtime:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def get_cache_name(cls: type) -> str:
+    """Return the name of the help cache file of the `Cli` class `cls`.
+
+    The name includes a hash of the source file of the class and of the
+    Python executable, so two programs that define a class with the same
+    name, like `__main__.Manage`, don't share it.
+    """
+    module = sys.modules.get(cls.__module__)
+    source = os.path.abspath(getattr(module, "__file__", None) or "")
+    digest = hashlib.sha1(f"{sys.executable}\n{source}".encode("utf8")).hexdigest()
+    return f"help-{cls.__module__}.{cls.__qualname__}-{digest[:12]}.json"
+
+
+class HelpCache:
+    """Stores the rendered help screens of a `Cli` tree in a file.
+
+    The file also stores the modification times of the source files of the
+    classes in the tree, including the lazy subgroups imported to render the
+    help, so the cache is discarded as soon as any of them changes.
+
+    Arguments:
+    - cls (type): The root `Cli` class.
+    - directory (str|Path): Where to store the cache. By default, the
+      directory returned by `get_cache_dir()`.
+    """
+
+    def __init__(
+        self,
+        cls: type,
+        directory: t.Union[str, Path, None] = None,
+    ) -> None:
+        self.cls = cls
+        self.directory = Path(directory) if directory else get_cache_dir()
+        self.path = self.directory / get_cache_name(cls)
+        self._entries: t.Optional[dict[str, str]] = None
+
+    def get(self, key: str) -> t.Optional[str]:
+        return self._load().get(key)
+
+    def set(self, key: str, text: str) -> None:
+        entries = self._load()
+        entries[key] = text
+        try:
+            self._save(entries)
+        except OSError:
+            pass
+
+    def _load(self) -> dict[str, str]:
+        if self._entries is None:
+            self._entries = {}
+            try:
+                data = json.loads(self.path.read_text("utf8"))
+            except (OSError, ValueError):
+                return self._entries
+            if is_fresh(data.get("files") or {}):
+                self._entries = data.get("entries") or {}
+        return self._entries
+
+    def _save(self, entries: dict[str, str]) -> None:
+        data = {"files": get_source_files(self.cls), "entries": entries}
+        path = self.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data), "utf8")
+        os.replace(tmp, path)
@@ -1,4 +1,15 @@
+import sys
+import threading
+import time
 import typing as t
+import weakref
+from operator import length_hint
+from threading import get_ident
+
+from .live import LiveRegion
+
+
+__all__ = ("ask", "confirm", "progress", "Progress", "YES_CHOICES", "NO_CHOICES")
 
 
 def ask(question: str, default: t.Any = None, alternatives: str = "") -> t.Any:
@@ -59,3 +70,230 @@ def confirm(
             return True
         if resp in no_choices:
             return False
+
+
+class Progress:
+    """A progress bar that costs a few tens of nanoseconds per item.
+
+    Iterating a list (or anything with a length hint) doesn't count the
+    items: the count is read from the length hint of the iterator. Other
+    iterables only store the count of items in an attribute. The bar is
+    drawn from a background thread every `interval` seconds, never from
+    the loop.
+
+        for path in progress(paths, label="Resizing"):
+            resize(path)
+
+        with Progress(total=len(jobs), label="Jobs") as bar:
+            for job in jobs:
+                pool.submit(run, job).add_done_callback(lambda _: bar.update())
+
+    When the stream is not a terminal, a summary line is written every
+    `log_interval` seconds instead, plus a final one.
+
+    Arguments:
+    - iterable (iterable): What to iterate, if iterating the `Progress`.
+    - total (int): Number of items. By default, the length of `iterable`.
+    - label (str): Text before the bar. It can have markup.
+    - stream (file): Where to write. By default, the *current* `sys.stderr`.
+    - interval (float): Seconds between redraws of the bar.
+    - log_interval (float): Seconds between summaries, when not in a terminal.
+    """
+
+    BAR_WIDTH = 30
+
+    def __init__(
+        self,
+        iterable: t.Optional[t.Iterable] = None,
+        total: t.Optional[int] = None,
+        label: str = "",
+        *,
+        stream: t.Optional[t.TextIO] = None,
+        interval: float = 0.1,
+        log_interval: float = 10.0,
+    ) -> None:
+        if total is None and iterable is not None:
+            total = length_hint(iterable) or None
+        self.iterable = iterable
+        self.total = total
+        self.label = label
+        self.interval = interval
+        self.log_interval = log_interval
+
+        # Items iterated so far, only written by the iterating thread
+        self._iterated = 0
+        # Items counted with `update()` by each thread, by thread id. Each
+        # thread only changes its own entry; the lock guards new entries
+        # and reading them all.
+        self._updates: dict[int, int] = {}
+        self._lock = threading.Lock()
+        # An iterator whose length hint tells how many items are left
+        self._source: t.Optional[t.Iterator] = None
+        # Reset by `start()`, but set here so a bar closed before
+        # starting doesn't count the time since the clock's epoch
+        self._started_at = self._logged_at = time.monotonic()
+        self._region = LiveRegion(stream or sys.stderr, max_fps=0)
+        self._stop = threading.Event()
+        self._thread: t.Optional[threading.Thread] = None
+        self._finalizer = weakref.finalize(self, _close_region, self._region, self._stop)
+
+    def __iter__(self) -> t.Iterator:
+        if self.iterable is None:
+            raise TypeError("there is nothing to iterate")
+        iterator = iter(self.iterable)
+        self.start()
+        if self.total is not None and length_hint(iterator) == self.total:
+            self._source = iterator
+            return self._iterate_sized(iterator)
+        return self._iterate(iterator)
+
+    def __enter__(self) -> "Progress":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def count(self) -> int:
+        """Number of items done so far."""
+        if self._source is not None:
+            done = (self.total or 0) - length_hint(self._source)
+        else:
+            done = self._iterated
+        with self._lock:
+            updated = sum(self._updates.values())
+        return done + updated
+
+    def update(self, n: int = 1) -> None:
+        """Count `n` more items as done. It can be called from any thread."""
+        updates = self._updates
+        ident = get_ident()
+        try:
+            updates[ident] += n
+        except KeyError:
+            with self._lock:
+                updates[ident] = n
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._started_at = self._logged_at = time.monotonic()
+        self._thread = threading.Thread(
+            target=_tick,
+            args=(weakref.ref(self), self._stop, self.interval),
+            name="proper_cli.Progress",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stop the background thread and write the final state."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        if self._region.is_tty:
+            self._region.update(self.render(), force=True)
+        else:
+            self._region.update(self.summary(final=True))
+        self._finalizer()
+
+    def render(self) -> str:
+        """The bar, with markup."""
+        done = self.count
+        elapsed = time.monotonic() - self._started_at
+        rate = done / elapsed if elapsed > 0 else 0.0
+        label = f"{self.label} " if self.label else ""
+
+        if not self.total:
+            return (
+                f"{label}<fg=light_green>{done}</> "
+                f"<fg=dark_gray>{_format_rate(rate)} {_format_time(elapsed)}</>"
+            )
+
+        ratio = min(done / self.total, 1.0)
+        filled = int(ratio * self.BAR_WIDTH)
+        bar = "=" * filled + " " * (self.BAR_WIDTH - filled)
+        eta = (self.total - done) / rate if rate else 0.0
+        return (
+            f"{label}[<fg=light_green>{bar}</>] {ratio:4.0%} {done}/{self.total} "
+            f"<fg=dark_gray>{_format_rate(rate)} eta {_format_time(eta)}</>"
+        )
+
+    def summary(self, final: bool = False) -> str:
+        """A line with the progress, for logs."""
+        done = self.count
+        elapsed = time.monotonic() - self._started_at
+        rate = done / elapsed if elapsed > 0 else 0.0
+        text = f"{self.label}: {done}" if self.label else str(done)
+        if self.total:
+            text = f"{text}/{self.total} ({min(done / self.total, 1.0):.0%})"
+        if final:
+            return f"{text} in {_format_time(elapsed)}"
+        return f"{text}, {_format_rate(rate)}"
+
+    def _tick(self) -> None:
+        if self._region.is_tty:
+            self._region.update(self.render())
+            return
+        now = time.monotonic()
+        if now - self._logged_at >= self.log_interval:
+            self._logged_at = now
+            self._region.stream.write(self.summary() + "\n")
+            self._region.stream.flush()
+
+    def _iterate_sized(self, iterator: t.Iterator) -> t.Iterator:
+        try:
+            yield from iterator
+        finally:
+            self.close()
+
+    def _iterate(self, iterator: t.Iterator) -> t.Iterator:
+        try:
+            for count, item in enumerate(iterator, 1):
+                self._iterated = count
+                yield item
+        finally:
+            self.close()
+
+
+def progress(
+    iterable: t.Iterable,
+    total: t.Optional[int] = None,
+    label: str = "",
+    **kwargs,
+) -> Progress:
+    """Show the progress of iterating `iterable`. See `Progress`."""
+    return Progress(iterable, total, label, **kwargs)
+
+
+def _tick(ref: weakref.ref, stop: threading.Event, interval: float) -> None:
+    while not stop.wait(interval):
+        bar = ref()
+        if bar is None:
+            return
+        bar._tick()
+        del bar
+
+
+def _close_region(region: LiveRegion, stop: threading.Event) -> None:
+    stop.set()
+    region.close()
+
+
+def _format_rate(rate: float) -> str:
+    for unit, scale in (("M", 1e6), ("k", 1e3)):
+        if rate >= scale:
+            return f"{rate / scale:.1f}{unit}/s"
+    return f"{rate:.1f}/s"
+
+
+def _format_time(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02}:{seconds:02}"
+    return f"{minutes}:{seconds:02}"
@@ -0,0 +1,200 @@
+"""Redraw a block of lines in place, like a dashboard or a progress report.
+
+    with LiveRegion() as region:
+        for step in steps:
+            region.update([
+                f"<info>Step</info> {step.number} of {len(steps)}",
+                f"  {step.name}",
+            ])
+            step.run()
+
+Each update only writes the cursor movements and the lines that changed
+since the last frame and, for lines without colors, only the part after
+what they have in common. Updates are throttled to `max_fps`; the last
+one is always drawn when the region is closed.
+
+When the stream is not a terminal, nothing is written until the region
+is closed, and then only the final frame.
+
+The lines should fit in the width of the terminal: a line that wraps
+breaks the cursor movements.
+"""
+import os
+import sys
+import threading
+import time
+import typing as t
+
+from . import pastel
+
+
+__all__ = ("LiveRegion",)
+
+CSI = "\033["
+CLEAR_LINE = f"{CSI}K"
+CLEAR_BELOW = f"{CSI}J"
+HIDE_CURSOR = f"{CSI}?25l"
+SHOW_CURSOR = f"{CSI}?25h"
+DEFAULT_FPS = 10
+
+Frame = t.Union[str, t.Sequence[str]]
+
+
+class LiveRegion:
+    """A block of lines that is redrawn in place at the end of the output.
+
+    Arguments:
+    - stream (file): Where to write. By default, the *current* `sys.stdout`.
+    - max_fps (float): Maximum number of frames written per second.
+    """
+
+    def __init__(
+        self,
+        stream: t.Optional[t.TextIO] = None,
+        max_fps: float = DEFAULT_FPS,
+    ) -> None:
+        self.stream = stream or sys.stdout
+        self.interval = 1 / max_fps if max_fps else 0.0
+        isatty = getattr(self.stream, "isatty", None)
+        self.is_tty = bool(isatty and isatty())
+        self.colorized = pastel.is_colorized(self.stream)
+        self.bytes_written = 0
+
+        self._lines: list[str] = []
+        self._pending: t.Optional[list[str]] = None
+        self._last_render = 0.0
+        self._started = False
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "LiveRegion":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def update(self, frame: Frame, force: bool = False) -> None:
+        """Set the lines of the region. They are drawn now, or when the
+        next frame is due, unless `force` is true.
+
+        Arguments:
+        - frame (str|list): The new lines, with markup, as a list or as
+          a text with line breaks.
+        - force (bool): Draw it now, even if the previous frame was
+          drawn less than `1 / max_fps` seconds ago.
+        """
+        if isinstance(frame, str):
+            frame = frame.split("\n")
+        with self._lock:
+            if self._closed:
+                return
+            self._pending = list(frame)
+            if not self.is_tty:
+                return
+            now = time.monotonic()
+            if force or now - self._last_render >= self.interval:
+                self._last_render = now
+                self._render()
+
+    def refresh(self) -> None:
+        """Draw the last frame now, if it wasn't drawn yet."""
+        with self._lock:
+            if self.is_tty and not self._closed:
+                self._last_render = time.monotonic()
+                self._render()
+
+    def close(self) -> None:
+        """Draw the last frame and leave the cursor after the region."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self.is_tty:
+                self._render()
+                if self._started:
+                    self._write(SHOW_CURSOR)
+            elif self._pending is not None:
+                text = "".join(f"{line}\n" for line in self._colorize(self._pending))
+                self._write(text)
+
+    def _render(self) -> None:
+        if self._pending is None:
+            return
+        new = self._colorize(self._pending)
+        self._pending = None
+
+        out = []
+        if not self._started:
+            self._started = True
+            out.append(HIDE_CURSOR)
+        out.append(diff_lines(self._lines, new))
+        self._lines = new
+        self._write("".join(out))
+
+    def _colorize(self, lines: t.Sequence[str]) -> list[str]:
+        colorized = self.colorized
+        return [pastel.colorize(line, colorized) for line in lines]
+
+    def _write(self, text: str) -> None:
+        if not text:
+            return
+        self.bytes_written += len(text)
+        self.stream.write(text)
+        self.stream.flush()
+
+
+def diff_lines(old: t.Sequence[str], new: t.Sequence[str]) -> str:
+    """Return what to write to turn the `old` lines into the `new` ones.
+
+    The cursor must be, and will be left, at the start of the line after
+    the region.
+    """
+    out = []
+    row = len(old)
+
+    for index in range(min(len(old), len(new))):
+        before, after = old[index], new[index]
+        if before == after:
+            continue
+        out.append(_move(row, index))
+        row = index
+
+        start = _common_prefix(before, after)
+        skip = f"{CSI}{start}C"
+        if start > len(skip):
+            out.append(f"\r{skip}{after[start:]}")
+        else:
+            out.append(f"\r{after}")
+            start = 0
+        if len(after) < len(before) or start == 0 and "\033" in before + after:
+            out.append(CLEAR_LINE)
+
+    if len(new) > len(old):
+        out.append(_move(row, len(old)) + "\r")
+        out.extend(f"{line}\n" for line in new[len(old) :])
+    else:
+        out.append(_move(row, len(new)) + "\r")
+        if len(new) < len(old):
+            out.append(CLEAR_BELOW)
+
+    text = "".join(out)
+    return "" if text == "\r" else text
+
+
+def _move(row: int, to: int) -> str:
+    if to < row:
+        return f"{CSI}{row - to}A"
+    if to > row:
+        return f"{CSI}{to - row}B"
+    return ""
+
+
+def _common_prefix(before: str, after: str) -> int:
+    """Length of the text the lines have in common, if it can be skipped
+    by moving the cursor: lines with escape sequences or with characters
+    that might not be one column wide are always written whole."""
+    if "\033" in before or "\033" in after:
+        return 0
+    if not (before.isascii() and after.isascii()):
+        return 0
+    return len(os.path.commonprefix([before, after]))
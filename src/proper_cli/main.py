@@ -1,4 +1,6 @@
 import inspect
+import json
+import os
 import sys
 import textwrap
 import typing as t
@@ -7,20 +9,55 @@ from pathlib import Path
 from signal import SIGTERM, signal
 from sys import stderr
 
-from . import pastel
+from . import completion, pastel, profiling
+from .aio import null_lifespan, run_async
+from .argfiles import expand_argfiles
+from .batching import (
+    JOBS_OPT,
+    Batch,
+    Result,
+    batchable,
+    get_batch,
+    get_jobs,
+    run_batch,
+    run_batch_async,
+)
+from .converters import ConversionError, build_plan
+from .help_cache import HelpCache
+from .output import capture, get_sink
 from .parser import parse_args
 from .pastel import add_style  # noqa
+from .profiling import profile
+from .registry import LazyGroup, Registry, get_registry, resolve_group
+from .suggestions import get_suggestions
 
 
-__all__ = ("echo", "add_style", "Cli")
+if t.TYPE_CHECKING:
+    from .aio import LoopFactory
+
+
+__all__ = ("echo", "echo_stream", "add_style", "batchable", "Cli", "LazyGroup")
 
 HELP_OPT = "help"
+# Exit code for invalid arguments, as argparse does
+USAGE_ERROR = 2
 INDENT = "  "
 INITIAL_INDENT = " "
 
 
 def echo(*texts: str, sep: str = " ") -> None:
-    print(pastel.colorize(sep.join(texts)))
+    get_sink().write(pastel.colorize(sep.join(texts)) + "\n")
+
+
+def echo_stream(chunks: t.Iterable[str]) -> None:
+    """Colorize and echo text as it arrives, eg: the lines of a huge file.
+
+    The chunks are written as they are, so they must include their own
+    line breaks. A style can be opened in a chunk and closed in a later one.
+    """
+    sink = get_sink()
+    for text in pastel.colorize_stream(chunks):
+        sink.write(text)
 
 
 def sigterm_handler(*args) -> None:
@@ -56,6 +93,11 @@ class Cli:
     _show_params: bool
     _echo: t.Callable
     _env: dict
+    _help_cache: t.Optional[HelpCache]
+
+    # Creates the event loop of the `async def` commands,
+    # eg: `uvloop.new_event_loop`. By default, `asyncio.new_event_loop`.
+    _loop_factory: "t.Optional[LoopFactory]" = None
 
     def __init__(
         self,
@@ -65,6 +107,7 @@ class Cli:
         initial_indent: str = INITIAL_INDENT,
         indent_start: int = 0,
         show_params: bool = True,
+        help_cache: t.Union[bool, str, Path, HelpCache, None] = None,
         **env,
     ) -> None:
         self._parent = parent
@@ -75,39 +118,49 @@ class Cli:
         self._echo = echo
         self._env = env
 
+        if help_cache and not isinstance(help_cache, HelpCache):
+            directory = None if help_cache is True else help_cache
+            help_cache = HelpCache(type(self), directory)
+        self._help_cache = help_cache or None
+
     def __call__(self) -> None:
         signal(SIGTERM, sigterm_handler)
+        profiler = profiling.profiler
+        if profiler:
+            profiler.mark("import")
+
+        shell = os.environ.get(completion.COMPLETION_ENV)
+        if shell:
+            self._parent = Path(sys.argv[0]).stem
+            return completion.run(self, shell)
 
         try:
-            parent, *sysargs = sys.argv
-            self._parent = Path(parent).stem
-            args, opts = parse_args(sysargs)
+            with profile("parse_args"):
+                parent, *sysargs = sys.argv
+                self._parent = Path(parent).stem
+                args, opts = parse_args(expand_argfiles(sysargs))
             self._run(*args, **opts)
         except KeyboardInterrupt:
             stderr.write("\n")
             exit(1)
+        finally:
+            if profiler:
+                profiler.report()
+
+    @property
+    def _registry(self) -> Registry:
+        return get_registry(type(self))
 
     @property
     def _commands(self):
-        commands = {}
-        names = [name for name in self.__dir__() if not name.startswith("_")]
-        for name in names:
-            cmd = getattr(self, name, None)
-            if inspect.isclass(cmd):
-                continue
-            commands[name] = cmd
-        return commands
+        return {name: getattr(self, name, None) for name in self._registry.commands}
 
     @property
     def _subgroups(self):
-        subgroups = {}
-        names = [name for name in self.__dir__() if not name.startswith("_")]
-        for name in names:
-            cls = getattr(self, name, None)
-            if not inspect.isclass(cls):
-                continue
-            subgroups[name] = cls
-        return subgroups
+        return {
+            name: resolve_group(group)
+            for name, group in self._registry.subgroups.items()
+        }
 
     def _indent(self, plus_level: int = 0) -> str:
         level = self._indent_level + plus_level
@@ -121,7 +174,13 @@ class Cli:
             return self._help()
 
         name, *args = args
-        cmd = getattr(self, name, None)
+        with profile("resolve"):
+            cls = self._registry.subgroups.get(name)
+            if cls is None:
+                cmd = getattr(self, name, None)
+
+        if cls is not None:
+            return self._run_subgroup(name, cls, args, opts)
         if not cmd:
             return self._command_not_found(name)
 
@@ -130,30 +189,45 @@ class Cli:
         return self._run_command(name, cmd, args, opts)
 
     def _command_not_found(self, name: str) -> None:
-        self._echo(f"\n<error> Command `{name}` not found </error>")
-        self._help()
+        self._echo(
+            f"\n<error> Command `{pastel.Pastel.escape(name)}` not found </error>"
+        )
+        suggestions = get_suggestions(type(self), name)
+        if suggestions:
+            self._echo(f"\n{self._indent()}<fg=yellow>Did you mean:</>\n")
+            for path in suggestions:
+                self._echo(f"{self._indent(1)}{self._parent} {path}")
+        self._echo(f"\n{self._indent()}<fg=yellow>Usage:</>\n")
+        self._echo(f"{self._indent(1)}{self._parent} <command> [args] [options]\n")
+        self._echo(
+            f"{self._indent(1)}"
+            f"Run `{self._parent} --help` for the list of commands.\n"
+        )
 
     def _init_subgroup(
         self,
         name: str,
-        cls: type,
-        indent_level: int = 0   ,
+        cls: t.Union[type, LazyGroup],
+        indent_level: int = 0,
     ) -> "Cli":
+        cls = resolve_group(cls)
         return cls(
             parent=f"{self._parent} {name}",
             indent_start=indent_level,
             show_params=self._show_params,
+            help_cache=self._help_cache,
             **self._env,
         )
 
     def _run_subgroup(
         self,
         name: str,
-        cls: type,
+        cls: t.Union[type, LazyGroup],
         args: list[str],
         opts: dict[str, t.Any],
     ) -> None:
-        cli = self._init_subgroup(name, cls)
+        with profile("resolve"):
+            cli = self._init_subgroup(name, cls)
         if not args:
             if not opts or opts == {HELP_OPT: True}:
                 return cli._help()
@@ -168,13 +242,159 @@ class Cli:
     ) -> None:
         if HELP_OPT in opts:
             return self._help_command(name, cmd)
-        return cmd(*args, **opts)
+        batch = get_batch(cmd)
+        if batch is not None:
+            return self._run_batch(name, cmd, batch, args, opts)
+        try:
+            args, opts = self._convert_args(name, cmd, args, opts)
+        except ConversionError as error:
+            self._echo(f"\n<error> {pastel.Pastel.escape(str(error))} </error>")
+            self._help_command(name, cmd)
+            raise SystemExit(USAGE_ERROR) from None
+        with profile("command"):
+            if inspect.iscoroutinefunction(cmd):
+                return self._run_async(cmd, args, opts)
+            return cmd(*args, **opts)
+
+    def _run_async(
+        self,
+        cmd: t.Callable,
+        args: list[t.Any],
+        opts: dict[str, t.Any],
+    ) -> t.Any:
+        async def main():
+            async with self._lifespan():
+                return await cmd(*args, **opts)
+
+        # Read from the class, so a plain function is not bound to `self`
+        loop_factory = type(self)._loop_factory
+        return run_async(main(), loop_factory=loop_factory)
+
+    def _lifespan(self) -> t.AsyncContextManager:
+        """Override to open and close the resources shared by the
+        `async def` commands, like connection pools. It runs once per
+        invocation, inside the event loop of the command:
+
+            @asynccontextmanager
+            async def _lifespan(self):
+                self.db = await create_pool()
+                try:
+                    yield
+                finally:
+                    await self.db.close()
+        """
+        return null_lifespan()
+
+    def _run_batch(
+        self,
+        name: str,
+        cmd: t.Callable,
+        batch: Batch,
+        items: list[str],
+        opts: dict[str, t.Any],
+    ) -> None:
+        """Run a `@batchable` command once per positional argument and
+        report the failures at the end."""
+        opts = dict(opts)
+        try:
+            jobs = get_jobs(batch, opts.pop(JOBS_OPT, None))
+            items = [
+                self._convert_args(name, cmd, [item], {})[0][0] for item in items
+            ]
+            _, opts = self._convert_args(name, cmd, [], opts)
+        except ValueError as error:
+            self._echo(f"\n<error> {pastel.Pastel.escape(str(error))} </error>")
+            self._help_command(name, cmd)
+            raise SystemExit(USAGE_ERROR) from None
+        if not items:
+            return self._help_command(name, cmd)
+
+        failed: list[Result] = []
+
+        def report(result: Result) -> None:
+            if result.output:
+                get_sink().write(result.output)
+            if result.code:
+                failed.append(result)
+
+        async def run_all() -> None:
+            async for result in run_batch_async(cmd, items, opts, jobs):
+                report(result)
+
+        with profile("command"):
+            if inspect.iscoroutinefunction(cmd):
+                # A single event loop and `_lifespan()` for all the runs
+                self._run_async(run_all, [], {})
+            else:
+                for result in run_batch(cmd, items, opts, jobs, batch.processes):
+                    report(result)
+
+        if not failed:
+            return
+        self._echo(f"\n<error> {len(failed)} of {len(items)} failed </error>")
+        for result in failed:
+            item = pastel.Pastel.escape(str(result.item))
+            error = pastel.Pastel.escape(result.error or f"Exit code {result.code}")
+            self._echo(
+                f"\n{self._indent()}<fg=yellow>{item}</>"
+                f"\n{textwrap.indent(error, self._indent(1))}"
+            )
+        raise SystemExit(1)
+
+    def _convert_args(
+        self,
+        name: str,
+        cmd: t.Callable,
+        args: list[str],
+        opts: dict[str, t.Any],
+    ) -> tuple[list[t.Any], dict[str, t.Any]]:
+        """Convert the arguments to the types of the annotations, or of the
+        default values, of the command. The converters are built once."""
+        plans = self._registry.plans
+        plan = plans.get(name)
+        if plan is None:
+            plan = plans[name] = build_plan(cmd)
+        if not plan:
+            return args, opts
+        return plan.apply(args, opts)
+
+    def _cached_help(self, key: list, render: t.Callable[[], None]) -> None:
+        """Write the help rendered by `render()`, reading it from the
+        help cache if it is enabled and the help was rendered before."""
+        with profile("help"):
+            self._write_help(key, render)
+
+    def _write_help(self, key: list, render: t.Callable[[], None]) -> None:
+        cache = self._help_cache
+        if cache is None:
+            return render()
+
+        key = json.dumps([
+            *key,
+            pastel.is_colorized(),
+            self._parent,
+            self._show_params,
+            self._indent_level,
+            self._indent_by,
+            self._indent_plus,
+        ])
+        text = cache.get(key)
+        if text is None:
+            with capture() as buffer:
+                render()
+            text = buffer.getvalue()
+            cache.set(key, text)
+
+        get_sink().write(text)
 
     def _help(self, header: bool = True) -> None:
+        self._cached_help(["help"], self._render_help)
+
+    def _render_help(self) -> None:
         self._help_intro()
         self._help_header()
         self._help_body()
-        print()
+        self._echo("")
 
     def _help_intro(self) -> None:
         doc = get_doc(self)
@@ -192,21 +412,34 @@ class Cli:
         self._echo(f"\n{self._indent()}<fg=yellow>Available Commands:</>\n")
 
     def _help_body(self) -> None:
-        for name, cmd in self._commands.items():
-            if name.startswith("_"):
-                continue
-            self._help_list_command(name, cmd)
-        for name, cls in self._subgroups.items():
+        registry = self._registry
+        for name in registry.commands:
+            self._help_list_command(name, getattr(self, name, None))
+        for name, cls in registry.subgroups.items():
             self._help_list_subgroup(name, cls)
 
-    def _help_list_subgroup(self, name: str, cls: type) -> None:
-        print()
+    def _help_list_subgroup(self, name: str, cls: t.Union[type, LazyGroup]) -> None:
+        self._echo("")
+        if isinstance(cls, LazyGroup):
+            return self._help_list_lazy_group(name, cls)
         cli = self._init_subgroup(name, cls, indent_level=self._indent_level)
         cli._help_body()
 
+    def _help_list_lazy_group(self, name: str, group: LazyGroup) -> None:
+        # Even if it's already imported, so the list is always the same
+        signature = self._get_path(name)
+        if self._show_params:
+            signature = f"{signature} <fg=dark_gray><command> [args]</>"
+        self._echo(f"{self._indent(1)}{signature}")
+        if group.help:
+            self._echo(f"{self._indent(4)}{group.help}")
+
     def _help_list_command(self, name: str, cmd: t.Callable) -> None:
-        doc = cmd.__doc__ or ""
-        cmd_help = doc.strip().split("\n")[0]
+        summaries = self._registry.summaries
+        cmd_help = summaries.get(name)
+        if cmd_help is None:
+            doc = cmd.__doc__ or ""
+            cmd_help = summaries[name] = doc.strip().split("\n")[0]
         signature = self._get_signature(name, cmd)
 
         self._echo(
@@ -215,24 +448,35 @@ class Cli:
         )
 
     def _help_command(self, name: str, cmd: t.Callable) -> None:
+        self._cached_help(
+            ["command", name], lambda: self._render_help_command(name, cmd)
+        )
+
+    def _render_help_command(self, name: str, cmd: t.Callable) -> None:
         signature = self._get_signature(name, cmd)
         doc = textwrap.indent(get_doc(cmd), self._indent())
 
         self._echo(f"\n{self._indent()}{signature}\n\n{doc}")
 
     def _get_signature(self, name: str, cmd: t.Callable) -> str:
-        parent = " ".join(self._parent.split(" ")[1:])
-        if parent:
-            parent = f"<fg=green>{parent}</> "
-
-        signature = f"{parent}<fg=light_green>{name}</>"
+        signature = self._get_path(name)
 
         if self._show_params:
-            params = self._get_params(cmd)
+            cached = self._registry.params
+            params = cached.get(name)
+            if params is None:
+                params = cached[name] = self._get_params(cmd)
             signature = f"{signature} <fg=dark_gray>{params}</>"
 
         return signature.strip()
 
+    def _get_path(self, name: str) -> str:
+        """The name of the command, after the names of its subgroups."""
+        parent = " ".join(self._parent.split(" ")[1:])
+        if parent:
+            parent = f"<fg=green>{parent}</> "
+        return f"{parent}<fg=light_green>{name}</>"
+
     def _get_params(self, cmd: t.Callable) -> str:
         sig = inspect.signature(cmd)
         params = []
@@ -245,4 +489,7 @@ class Cli:
             else:
                 params.append(f"[--{name}={repr(pp.default)}]")
 
+        if get_batch(cmd) is not None:
+            params.append(f"[--{JOBS_OPT}=N]")
+
         return " ".join(params)
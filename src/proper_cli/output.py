@@ -0,0 +1,159 @@
+import atexit
+import io
+import sys
+import threading
+import typing as t
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+__all__ = (
+    "batch",
+    "capture",
+    "BufferedSink",
+    "StreamSink",
+    "get_sink",
+    "set_sink",
+)
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+
+class StreamSink:
+    """Writes the text to the stream as soon as it is echoed.
+
+    Arguments:
+    - stream (file): Where to write. By default, the *current* `sys.stdout`.
+    """
+
+    def __init__(self, stream: t.Optional[t.TextIO] = None) -> None:
+        self.stream = stream
+
+    def write(self, text: str) -> None:
+        (self.stream or sys.stdout).write(text)
+
+    def flush(self) -> None:
+        (self.stream or sys.stdout).flush()
+
+    def close(self) -> None:
+        self.flush()
+
+
+class BufferedSink(StreamSink):
+    """Gathers the echoed text and writes it to the stream in a single call
+    when the buffer reaches `max_size`, when `flush()` is called, or at exit.
+
+    If the stream is an interactive terminal, the text is written right away.
+
+    Arguments:
+    - stream (file): Where to write. By default, the *current* `sys.stdout`.
+    - max_size (int): Number of buffered characters that triggers a flush.
+    """
+
+    def __init__(
+        self,
+        stream: t.Optional[t.TextIO] = None,
+        max_size: int = DEFAULT_BUFFER_SIZE,
+    ) -> None:
+        super().__init__(stream)
+        self.max_size = max_size
+        self._chunks: list[str] = []
+        self._size = 0
+        self._lock = threading.Lock()
+        self._checked_stream = None
+        self._isatty = False
+        atexit.register(self.flush)
+
+    def write(self, text: str) -> None:
+        stream = self.stream or sys.stdout
+        with self._lock:
+            self._chunks.append(text)
+            self._size += len(text)
+            if self._size >= self.max_size or self._is_tty(stream):
+                self._write_chunks(stream)
+
+    def flush(self) -> None:
+        stream = self.stream or sys.stdout
+        with self._lock:
+            self._write_chunks(stream)
+        stream.flush()
+
+    def close(self) -> None:
+        self.flush()
+        atexit.unregister(self.flush)
+
+    def _write_chunks(self, stream: t.TextIO) -> None:
+        if not self._chunks:
+            return
+        stream.write("".join(self._chunks))
+        self._chunks.clear()
+        self._size = 0
+
+    def _is_tty(self, stream: t.TextIO) -> bool:
+        if stream is not self._checked_stream:
+            self._checked_stream = stream
+            isatty = getattr(stream, "isatty", None)
+            self._isatty = bool(isatty and isatty())
+        return self._isatty
+
+
+_sink: StreamSink = StreamSink()
+# Set by `capture()`, per thread and per asyncio task
+_captured: "ContextVar[t.Optional[StreamSink]]" = ContextVar(
+    "proper_cli_captured", default=None
+)
+
+
+def get_sink() -> StreamSink:
+    """Return the sink used by `echo()` in the current thread or task."""
+    return _captured.get() or _sink
+
+
+def set_sink(sink: StreamSink) -> StreamSink:
+    """Make `echo()` write to `sink` and return the previous one."""
+    global _sink
+    previous = _sink
+    _sink = sink
+    return previous
+
+
+@contextmanager
+def batch(max_size: int = DEFAULT_BUFFER_SIZE) -> t.Iterator[StreamSink]:
+    """Buffer everything echoed inside the block and write it in as few
+    calls as possible. The buffer is flushed when the block ends.
+
+        with batch():
+            for row in rows:
+                echo(row)
+
+    """
+    if isinstance(_sink, BufferedSink):
+        # Already batching, so nested blocks keep the original order.
+        yield _sink
+        return
+
+    sink = BufferedSink(max_size=max_size)
+    previous = set_sink(sink)
+    try:
+        yield sink
+    finally:
+        set_sink(previous)
+        sink.close()
+
+
+@contextmanager
+def capture() -> t.Iterator[io.StringIO]:
+    """Capture everything echoed *by the current thread*, or asyncio task,
+    inside the block, while the others keep writing to the usual sink.
+
+        with capture() as buffer:
+            echo("Hello")
+        assert buffer.getvalue() == "Hello\n"
+
+    """
+    buffer = io.StringIO()
+    token = _captured.set(StreamSink(buffer))
+    try:
+        yield buffer
+    finally:
+        _captured.reset(token)
@@ -2,11 +2,12 @@ import typing as t
 
 
 NEGATIVE_FLAG_PREFIX = "no-"
+END_OF_OPTIONS = "--"
 
 
 def parse_args(
-    cliargs: t.Sequence[str],
-) -> tuple[list[str], dict[str, t.Any]]:  # noqa: C901
+    cliargs: t.Iterable[str],
+) -> tuple[list[str], dict[str, t.Any]]:
     """Parse the command line arguments and return a list of the positional
     arguments and a dictionary with the named ones.
 
@@ -22,22 +23,26 @@ def parse_args(
         >>> parse_args(["-f", "1", "-f", "2", "-f", "3"])
         ([], {'f': ['1', '2', '3']})
 
-    """
-    # Split the "key=arg" arguments
-    largs = []
-    for arg in cliargs:
-        if "-" == arg[0] and "=" in arg:
-            key, arg = arg.split("=", 1)
-            largs.append(key)
-        largs.append(arg)
+    The arguments after `--` are positional, even if they look like keys:
+
+        >>> parse_args(["-v", "--", "-x", "--foo=bar"])
+        (['-x', '--foo=bar'], {'v': True})
 
+    """
     args = []
+    kwargs: dict[str, t.Any] = {}
+    # Keys followed by another key instead of a value
     flags = []
-    kwargs = {}
     key = None
-    for sarg in largs:
-        if is_key(sarg):
-            if key is not None:
+
+    tokens = tokenize(cliargs)
+    for sarg in tokens:
+        if sarg == END_OF_OPTIONS:
+            args.extend(tokens)
+            break
+
+        if sarg[:1] == "-" and is_key(sarg):
+            if key:
                 flags.append(key)
             key = sarg.strip("-")
             continue
@@ -47,18 +52,16 @@ def parse_args(
             continue
 
         value = kwargs.get(key)
-        if value:
-            if isinstance(value, list):
-                value.append(sarg)
-            else:
-                value = [value, sarg]
-            kwargs[key] = value
-        else:
+        if not value:
             kwargs[key] = sarg
+        elif isinstance(value, list):
+            value.append(sarg)
+        else:
+            kwargs[key] = [value, sarg]
 
-    # Get the flags
     if key:
         flags.append(key)
+
     # An extra key without a value is a flag if it has not been used before.
     # Otherwise is a typo.
     for flag in flags:
@@ -73,6 +76,32 @@ def parse_args(
     return args, kwargs
 
 
+def tokenize(cliargs: t.Iterable[str]) -> t.Iterator[str]:
+    """Yield the arguments one by one, splitting the "-key=value" ones
+    in two, without building an intermediate list. The ones after `--`
+    are not split.
+
+        >>> list(tokenize(["abc", "-w=3", "x=y", "--foo=a=b"]))
+        ['abc', '-w', '3', 'x=y', '--foo', 'a=b']
+
+        >>> list(tokenize(["-w=3", "--", "-w=3"]))
+        ['-w', '3', '--', '-w=3']
+
+    """
+    cliargs = iter(cliargs)
+    for arg in cliargs:
+        if arg == END_OF_OPTIONS:
+            yield arg
+            yield from cliargs
+            return
+        if arg[:1] == "-" and "=" in arg:
+            key, value = arg.split("=", 1)
+            yield key
+            yield value
+        else:
+            yield arg
+
+
 def is_key(sarg: str) -> bool:
     """Check if `sarg` is a key (eg. -foo, --foo) or a negative number (eg. -33)."""
     if not sarg.startswith("-"):
@@ -21,24 +21,83 @@ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 """
+from . import terminal
+from .markup import Markup  # noqa
 from .pastel import Pastel
+from .terminal import get_color_depth, invalidate  # noqa
 
 
 __version__ = "0.2.1"
 _PASTEL = Pastel(True)
 
 
-def colorize(message):
+def colorize(message, colorized=None):
     """
     Formats a message to a colorful string.
 
     :param message: The message to format.
     :type message: str
 
+    :param colorized: Whether to add the colors. By default, if
+        ``sys.stdout`` supports them.
+    :type colorized: bool or None
+
     :rtype: str
     """
-    with _PASTEL.colorized():
-        return _PASTEL.colorize(message)
+    if "<" not in message:
+        return message
+
+    if colorized is None:
+        colorized = is_colorized()
+    return _PASTEL.colorize(message, colorized)
+
+
+def compile(message):
+    """
+    Compiles a message, or a template with ``str.format``-style placeholders,
+    so it can be rendered many times.
+
+    :param message: The message to compile.
+    :type message: str
+
+    :rtype: Markup
+    """
+    return _PASTEL.compile(message, is_colorized())
+
+
+def colorize_stream(chunks):
+    """
+    Formats text that arrives in chunks, like the lines of a file,
+    yielding the colorful text of each one.
+
+    :param chunks: An iterable of strings.
+    :type chunks: Iterable[str]
+
+    :rtype: Iterator[str]
+    """
+    return _PASTEL.colorize_stream(chunks, is_colorized())
+
+
+def cache_info():
+    """
+    Returns the hits, misses, maximum and current size
+    of the compiled messages cache.
+
+    :rtype: CacheInfo
+    """
+    return _PASTEL.cache_info()
+
+
+def is_colorized(stream=None):
+    """
+    Whether colorize() adds colors to the output right now, or to
+    the output written to ``stream``.
+    The capabilities of the terminal are detected once and cached,
+    call ``invalidate()`` after redirecting ``sys.stdout``.
+
+    :rtype: bool
+    """
+    return _PASTEL.is_colorized() and terminal.supports_color(stream)
 
 
 def with_colors(colorized):
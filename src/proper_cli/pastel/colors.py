@@ -0,0 +1,128 @@
+"""
+Escape codes for 256-color (``color(208)``) and truecolor (``#ff8800``)
+specs, downsampled to what the terminal supports.
+
+The nearest-color lookups use tables built once, at import time:
+
+- for truecolor to 256 colors, the nearest level of the 6x6x6 color cube
+  and of the gray ramp for every channel value (0-255);
+- for 256 to 16 colors, the nearest basic color of each palette entry.
+
+So converting a color is a few list lookups instead of a distance search,
+and the escape code of every (spec, depth) is cached.
+"""
+import re
+from functools import lru_cache
+
+from .terminal import COLORS_16, COLORS_256
+
+
+HEX_REGEX = re.compile(r"#([0-9a-f]{3}|[0-9a-f]{6})", re.IGNORECASE)
+COLOR_REGEX = re.compile(r"color\(\s*(\d{1,3})\s*\)", re.IGNORECASE)
+
+# The default palette of xterm for the 16 basic colors
+BASIC_RGB = (
+    (0, 0, 0),
+    (205, 0, 0),
+    (0, 205, 0),
+    (205, 205, 0),
+    (0, 0, 238),
+    (205, 0, 205),
+    (0, 205, 205),
+    (229, 229, 229),
+    (127, 127, 127),
+    (255, 0, 0),
+    (0, 255, 0),
+    (255, 255, 0),
+    (92, 92, 255),
+    (255, 0, 255),
+    (0, 255, 255),
+    (255, 255, 255),
+)
+CUBE_LEVELS = (0, 95, 135, 175, 215, 255)
+GRAY_LEVELS = tuple(8 + 10 * i for i in range(24))
+
+
+def _distance(a, b):
+    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2
+
+
+def _nearest_index(value, levels):
+    return min(range(len(levels)), key=lambda i: abs(levels[i] - value))
+
+
+PALETTE_256 = (
+    BASIC_RGB
+    + tuple((r, g, b) for r in CUBE_LEVELS for g in CUBE_LEVELS for b in CUBE_LEVELS)
+    + tuple((v, v, v) for v in GRAY_LEVELS)
+)
+CUBE_INDEX = tuple(_nearest_index(v, CUBE_LEVELS) for v in range(256))
+GRAY_INDEX = tuple(_nearest_index(v, GRAY_LEVELS) for v in range(256))
+NEAREST_16 = tuple(
+    min(range(16), key=lambda i: _distance(rgb, BASIC_RGB[i])) for rgb in PALETTE_256
+)
+
+
+def rgb_to_256(r, g, b):
+    """
+    Returns the index of the nearest color of the 256-color palette.
+
+    :rtype: int
+    """
+    cube = 16 + 36 * CUBE_INDEX[r] + 6 * CUBE_INDEX[g] + CUBE_INDEX[b]
+    gray = 232 + GRAY_INDEX[(r + g + b) // 3]
+    rgb = (r, g, b)
+    if _distance(rgb, PALETTE_256[gray]) < _distance(rgb, PALETTE_256[cube]):
+        return gray
+    return cube
+
+
+def parse_color(spec):
+    """
+    Returns the palette index (for ``color(n)``) or the ``(r, g, b)``
+    tuple (for ``#rgb`` and ``#rrggbb``) of the spec, or ``None`` if it
+    is neither.
+
+    :rtype: int or tuple or None
+    """
+    match = HEX_REGEX.fullmatch(spec)
+    if match:
+        value = match.group(1)
+        if len(value) == 3:
+            value = "".join(char * 2 for char in value)
+        return tuple(int(value[i : i + 2], 16) for i in (0, 2, 4))
+
+    match = COLOR_REGEX.fullmatch(spec)
+    if match:
+        index = int(match.group(1))
+        if index < 256:
+            return index
+
+    return None
+
+
+@lru_cache(maxsize=4096)
+def get_code(spec, depth=None, background=False):
+    """
+    Returns the SGR code of the color spec, downsampled to the color depth
+    (16, 256 or truecolor, the default), or ``None`` if the spec is invalid.
+
+    :rtype: str or None
+    """
+    color = parse_color(spec)
+    if color is None:
+        return None
+
+    if isinstance(color, tuple):
+        if depth is not None and depth <= COLORS_256:
+            color = rgb_to_256(*color)
+        else:
+            return "{};2;{};{};{}".format(48 if background else 38, *color)
+
+    if depth is not None and depth <= COLORS_16:
+        color = NEAREST_16[color]
+    if color < 16:
+        base = 30 if color < 8 else 82
+        return str(base + color + (10 if background else 0))
+
+    return "{};5;{}".format(48 if background else 38, color)
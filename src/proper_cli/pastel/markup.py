@@ -0,0 +1,40 @@
+RESET = "\033[0m"
+
+
+class Markup(object):
+    """
+    A markup string compiled into a list of ``(text, prefix)`` segments,
+    where ``prefix`` is the ANSI sequence that opens the style of the text,
+    or an empty string if the text is not styled.
+
+    A compiled markup can be rendered many times. If it was compiled from
+    a template, its ``str.format``-style placeholders are filled by the values
+    passed to ``render()``. The values are inserted as-is, they are not
+    parsed as markup.
+    """
+
+    __slots__ = ("segments", "text")
+
+    def __init__(self, segments):
+        self.segments = tuple(segments)
+        self.text = "".join(
+            prefix + text + RESET if prefix else text for text, prefix in self.segments
+        )
+
+    def render(self, *args, **kwargs):
+        """
+        Returns the colorized text, with its placeholders filled
+        if any values are given.
+
+        :rtype: str
+        """
+        if not (args or kwargs):
+            return self.text
+
+        return self.text.format(*args, **kwargs)
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return "<Markup {!r}>".format(self.text)
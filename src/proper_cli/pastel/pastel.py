@@ -22,22 +22,41 @@ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 """
 import re
-import sys
 from contextlib import contextmanager
+from functools import lru_cache
 
+from .markup import Markup
 from .stack import StyleStack
 from .style import Style
+from .terminal import COLORS_256, get_color_depth, supports_color
 
 
 class Pastel(object):
 
-    TAG_REGEX = "[a-z][a-z0-9,_=;-]*"
+    TAG_REGEX = "[a-z][a-z0-9,_=;#()-]*"
     FULL_TAG_REGEX = re.compile("(?isx)<(({}) | /({})?)>".format(TAG_REGEX, TAG_REGEX))
-
-    def __init__(self, colorized=False):
+    # The start of a tag that may be completed by the next chunk of a stream
+    PARTIAL_TAG_REGEX = re.compile("(?is)</?({})?\\Z".format(TAG_REGEX))
+    MAX_PARTIAL_TAG_LENGTH = 256
+    CACHE_SIZE = 1024
+    # Longer messages are compiled without being cached
+    CACHE_MAX_LENGTH = 4096
+    STYLE_CACHE_SIZE = 4096
+
+    def __init__(self, colorized=False, color_depth=None):
         self._colorized = colorized
-        self._style_stack = StyleStack()
+        # None to detect it from the terminal
+        self._color_depth = color_depth
+        # Shared by the stacks of every compilation, it is never modified
+        self._empty_style = Style()
         self._styles = {}
+        # The color depth is part of the keys of these caches, so the
+        # styles are never changed while another thread is using them.
+        # (name, depth) -> Style
+        self._depth_styles = {}
+        # (tag string, depth) -> Style (or False if it is not a valid style)
+        self._style_cache = {}
+        self._compile_cached = lru_cache(maxsize=self.CACHE_SIZE)(self._compile)
 
         self.add_style("error", "white", "red")
         self.add_style("info", "green")
@@ -53,7 +72,7 @@ class Pastel(object):
         is_colorized = self.is_colorized()
 
         if colorized is None:
-            colorized = sys.stdout.isatty() and is_colorized
+            colorized = is_colorized and supports_color()
 
         self.with_colors(colorized)
 
@@ -69,8 +88,12 @@ class Pastel(object):
 
     def add_style(self, name, fg=None, bg=None, options=None):
         style = Style(fg, bg, options)
+        # The compiled markup must not outlive a change to the style
+        style._on_change = self._clear_styles
 
+        self._detach_style(name)
         self._styles[name] = style
+        self._clear_styles()
 
     def has_style(self, name):
         return name in self._styles
@@ -83,74 +106,208 @@ class Pastel(object):
         if not self.has_style(name):
             raise ValueError("Invalid style {}".format(name))
 
+        self._detach_style(name)
         del self._styles[name]
+        self._clear_styles()
 
-    def colorize(self, message):  # noqa
-        output = ""
-        tags = []
-        i = 0
-        for m in self.FULL_TAG_REGEX.finditer(message):
-            if i > 0:
-                p = tags[i - 1]
-                tags[i - 1] = (p[0], p[1], p[2], p[3], m.start(0))
+    def colorize(self, message, colorized=None):
+        if "<" not in message:
+            # No tags (nor escaped ones): nothing to do
+            return message
+
+        return self.compile(message, colorized).text
+
+    def compile(self, message, colorized=None):
+        """
+        Compiles a markup string, or a template with ``str.format``-style
+        placeholders, so it can be rendered many times without parsing
+        it again.
+
+        All the state of the compilation is local, so it is safe to call
+        it from many threads at once. Pass ``colorized`` instead of using
+        the ``colorized()`` context manager, which changes the instance.
+
+        :rtype: Markup
+        """
+        if "<" not in message:
+            return Markup([(message, "")] if message else [])
+
+        if colorized is None:
+            colorized = self._colorized
+        depth = self.color_depth() if colorized else None
+        if len(message) > self.CACHE_MAX_LENGTH:
+            return self._compile(message, colorized, depth)
+
+        return self._compile_cached(message, colorized, depth)
+
+    def colorize_stream(self, chunks, colorized=None):
+        """
+        Colorizes text that arrives in chunks, like the lines of a file,
+        and yields the colorized text of each one.
+
+        A style opened in a chunk keeps applying to the next ones, and a
+        tag split between two chunks is still recognized, so the memory
+        used doesn't depend on the size of the whole text.
+
+        :param chunks: An iterable of strings, eg: an open file.
+        :rtype: Iterator[str]
+        """
+        if colorized is None:
+            colorized = self._colorized
+        depth = self.color_depth() if colorized else None
+        stack = StyleStack(self._empty_style)
+        pending = ""
+
+        for chunk in chunks:
+            if pending:
+                chunk = pending + chunk
+            pending = ""
+            if "<" not in chunk and "\\" not in chunk[-1:]:
+                if chunk:
+                    yield self._render_chunk(chunk, colorized, depth, stack)
+                continue
+
+            cut = self._find_partial_tag(chunk)
+            if cut is not None:
+                chunk, pending = chunk[:cut], chunk[cut:]
+            if chunk:
+                yield self._render_chunk(chunk, colorized, depth, stack)
 
-            tags.append((m.group(0), m.end(0), m.group(1), m.group(3), None))
+        if pending:
+            yield self._render_chunk(pending, colorized, depth, stack)
 
-            i += 1
+    def color_depth(self):
+        """
+        Returns the number of colors the ``#rrggbb`` and ``color(n)``
+        colors are downsampled to. Unless it was given, it is detected
+        from the terminal, and 256 if the output is not one.
 
-        if not tags:
-            return message.replace("\\<", "<")
+        :rtype: int
+        """
+        return self._color_depth or get_color_depth() or COLORS_256
 
+    def cache_info(self):
+        """
+        Returns the hits, misses, maximum and current size of the
+        compiled markup cache.
+        """
+        return self._compile_cached.cache_info()
+
+    def cache_clear(self):
+        self._compile_cached.cache_clear()
+
+    def _compile(self, message, colorized, depth):
+        segments = []
+        self._scan(message, colorized, depth, StyleStack(self._empty_style), segments)
+
+        return Markup(segments)
+
+    def _scan(self, message, colorized, depth, stack, segments):
         offset = 0
-        for t in tags:
-            prev_offset = offset
-            offset = t[1]
-            endpos = t[4] if t[4] else -1
-            text = t[0]
-            if prev_offset < offset - len(text):
-                output += self._apply_current_style(
-                    message[prev_offset : offset - len(text)]
-                )
-
-            if offset != 0 and "\\" == message[offset - len(text) - 1]:
-                output += self._apply_current_style(text)
+        for m in self.FULL_TAG_REGEX.finditer(message):
+            start = m.start()
+            text = m.group(0)
+
+            if start > 0 and "\\" == message[start - 1]:
+                # An escaped tag is just text
+                self._add_segment(segments, message[offset : start - 1], colorized, stack)
+                self._add_segment(segments, text, colorized, stack)
+                offset = m.end()
                 continue
 
+            self._add_segment(segments, message[offset:start], colorized, stack)
+            offset = m.end()
+
             # opening tag?
             open = "/" != text[1]
             if open:
-                tag = t[2]
+                tag = m.group(2)
             else:
-                tag = t[3] if t[3] else ""
+                tag = m.group(3) or ""
 
-            style = self._create_style_from_string(tag.lower())
             if not open and not tag:
                 # </>
-                self._style_stack.pop()
-            elif style is False:
-                output += self._apply_current_style(text)
+                stack.pop()
+                continue
+
+            style = self._create_style_from_string(tag.lower(), depth)
+            if style is False:
+                self._add_segment(segments, text, colorized, stack)
             elif open:
-                self._style_stack.push(style)
+                stack.push(style)
             else:
-                self._style_stack.pop(style)
-
-            # add the text up to the next tag
-            output += self._apply_current_style(message[offset:endpos])
-            offset += len(message[offset:endpos])
-
-        output += self._apply_current_style(message[offset:])
+                stack.pop(style)
+
+        self._add_segment(segments, message[offset:], colorized, stack)
+
+    def _detach_style(self, name):
+        style = self._styles.get(name)
+        if style is not None:
+            style._on_change = None
+
+    def _clear_styles(self):
+        self._depth_styles = {}
+        self._style_cache = {}
+        self.cache_clear()
+
+    def _render_chunk(self, chunk, colorized, depth, stack):
+        segments = []
+        self._scan(chunk, colorized, depth, stack, segments)
+        return Markup(segments).text
+
+    def _find_partial_tag(self, chunk):
+        """
+        Returns where the tag, or the escape, that might continue in the
+        next chunk starts, if there is one at the end of this chunk.
+        """
+        if chunk.endswith("\\"):
+            return len(chunk) - 1
+
+        start = chunk.rfind("<")
+        if start == -1 or len(chunk) - start > self.MAX_PARTIAL_TAG_LENGTH:
+            return None
+        if not self.PARTIAL_TAG_REGEX.match(chunk, start):
+            return None
+        if start > 0 and chunk[start - 1] == "\\":
+            start -= 1
+        return start
+
+    def _create_style_from_string(self, string, depth=None):
+        key = (string, depth)
+        cache = self._style_cache
+        style = cache.get(key)
+        if style is not None:
+            return style
+
+        style = self._parse_style(string, depth)
+        if len(cache) >= self.STYLE_CACHE_SIZE:
+            cache.clear()
+        cache[key] = style
+        return style
 
-        return output.replace("\\<", "<")
+    def _get_style(self, name, depth):
+        """Returns the named style ``name`` with its colors for ``depth``."""
+        if depth is None:
+            return self._styles[name]
+        key = (name, depth)
+        style = self._depth_styles.get(key)
+        if style is None:
+            base = self._styles[name]
+            style = Style(
+                base.foreground, base.background, base.options, color_depth=depth
+            )
+            self._depth_styles[key] = style
+        return style
 
-    def _create_style_from_string(self, string):
+    def _parse_style(self, string, depth=None):
         if string in self._styles:
-            return self._styles[string]
+            return self._get_style(string, depth)
 
         matches = re.findall("([^=]+)=([^;]+)(;|$)", string.lower())
         if not len(matches):
             return False
 
-        style = Style()
+        style = Style(color_depth=depth)
 
         for match in matches:
             if match[0] == "fg":
@@ -166,8 +323,12 @@ class Pastel(object):
 
         return style
 
-    def _apply_current_style(self, text):
-        if self.is_colorized() and len(text):
-            return self._style_stack.get_current().apply(text)
+    def _add_segment(self, segments, text, colorized, stack):
+        if not text:
+            return
+
+        text = text.replace("\\<", "<")
+        if colorized:
+            segments.append((text, stack.get_current().open_sequence))
         else:
-            return text
+            segments.append((text, ""))
@@ -42,14 +42,23 @@ class StyleStack(object):
         if not style:
             return self.styles.pop()
 
-        for i, stacked_style in enumerate(reversed(self.styles)):
-            if style == stacked_style:
-                self.styles = self.styles[: len(self.styles) - 1 - i]
+        # Interned styles can be matched by identity
+        for i in range(len(self.styles) - 1, -1, -1):
+            if style is self.styles[i]:
+                return self._pop_from(i)
 
-                return stacked_style
+        for i in range(len(self.styles) - 1, -1, -1):
+            if style == self.styles[i]:
+                return self._pop_from(i)
 
         raise ValueError("Incorrectly nested style tag found.")
 
+    def _pop_from(self, index):
+        stacked_style = self.styles[index]
+        del self.styles[index:]
+
+        return stacked_style
+
     def get_current(self):
         if not len(self.styles):
             return self.empty_style
@@ -21,6 +21,7 @@ OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 """
+from .colors import get_code
 
 
 class Style(object):
@@ -75,11 +76,32 @@ class Style(object):
         "conceal": 8,
     }
 
-    def __init__(self, foreground=None, background=None, options=None):
+    RESET_SEQUENCE = "\033[0m"
+
+    __slots__ = (
+        "_fg",
+        "_bg",
+        "_foreground",
+        "_background",
+        "_options",
+        "_color_depth",
+        "_open_sequence",
+        "_reset_sequence",
+        "_on_change",
+    )
+
+    def __init__(self, foreground=None, background=None, options=None, color_depth=None):
+        # Called after the style changes, so the markup compiled with it
+        # can be discarded
+        self._on_change = None
         self._fg = foreground
         self._bg = background
         self._foreground = None
         self._background = None
+        self._options = {}
+        self._color_depth = color_depth
+        self._open_sequence = ""
+        self._reset_sequence = ""
 
         if foreground:
             self.set_foreground(foreground)
@@ -105,25 +127,62 @@ class Style(object):
     def options(self):
         return list(self._options.values())
 
+    @property
+    def open_sequence(self):
+        """The ANSI sequence that starts this style, or an empty string
+        if the style has no colors or options."""
+        return self._open_sequence
+
+    @property
+    def reset_sequence(self):
+        """The ANSI sequence that ends this style, or an empty string
+        if the style has no colors or options."""
+        return self._reset_sequence
+
+    @property
+    def color_depth(self):
+        """The number of colors the ``#rrggbb`` and ``color(n)`` colors
+        are downsampled to (16 or 256), or ``None`` for truecolor."""
+        return self._color_depth
+
     def set_foreground(self, foreground):
-        if foreground not in self.FOREGROUND_COLORS:
+        code = self.FOREGROUND_COLORS.get(foreground) or get_code(
+            foreground, self._color_depth
+        )
+        if code is None:
             raise ValueError(
-                'Invalid foreground specified: "{}". Expected one of ({})'.format(
+                'Invalid foreground specified: "{}". Expected one of ({}), '
+                "#rrggbb or color(0-255)".format(
                     foreground, ", ".join(self.FOREGROUND_COLORS.keys())
                 )
             )
 
-        self._foreground = self.FOREGROUND_COLORS[foreground]
+        self._fg = foreground
+        self._foreground = code
+        self._refresh()
 
     def set_background(self, background):
-        if background not in self.FOREGROUND_COLORS:
+        code = self.BACKGROUND_COLORS.get(background) or get_code(
+            background, self._color_depth, background=True
+        )
+        if code is None:
             raise ValueError(
-                'Invalid background specified: "{}". Expected one of ({})'.format(
+                'Invalid background specified: "{}". Expected one of ({}), '
+                "#rrggbb or color(0-255)".format(
                     background, ", ".join(self.BACKGROUND_COLORS.keys())
                 )
             )
 
-        self._background = self.BACKGROUND_COLORS[background]
+        self._bg = background
+        self._background = code
+        self._refresh()
+
+    def set_color_depth(self, color_depth):
+        self._color_depth = color_depth
+        if self._fg:
+            self.set_foreground(self._fg)
+        if self._bg:
+            self.set_background(self._bg)
 
     def set_option(self, option):
         if option not in self.OPTIONS:
@@ -135,6 +194,7 @@ class Style(object):
 
         if option not in self._options:
             self._options[self.OPTIONS[option]] = option
+        self._refresh()
 
     def unset_option(self, option):
         if option not in self.OPTIONS:
@@ -145,14 +205,22 @@ class Style(object):
             )
 
         del self._options[self.OPTIONS[option]]
+        self._refresh()
 
     def set_options(self, options):
         self._options = {}
 
         for option in options:
             self.set_option(option)
+        self._refresh()
 
     def apply(self, text):
+        if not self._open_sequence:
+            return text
+
+        return self._open_sequence + text + self._reset_sequence
+
+    def _refresh(self):
         codes = []
 
         if self._foreground:
@@ -165,9 +233,14 @@ class Style(object):
             codes += list(self._options.keys())
 
         if not len(codes):
-            return text
-
-        return "\033[%sm%s\033[0m" % (";".join(map(str, codes)), text)
+            self._open_sequence = ""
+            self._reset_sequence = ""
+        else:
+            self._open_sequence = "\033[%sm" % ";".join(map(str, codes))
+            self._reset_sequence = self.RESET_SEQUENCE
+
+        if self._on_change is not None:
+            self._on_change()
 
     def __eq__(self, other):
         return (
@@ -0,0 +1,123 @@
+"""
+Detects how many colors the terminal supports.
+
+The detection reads the environment and calls ``isatty()``, so its
+result is cached per output stream. Call ``invalidate()`` after
+redirecting the file descriptors of a stream, or after changing the
+environment variables below.
+
+- ``NO_COLOR`` (not empty) disables the colors.
+- ``FORCE_COLOR`` enables them, even if the stream is not a terminal.
+  ``0`` or ``false`` disables them; ``1``, ``2`` and ``3`` force 16, 256
+  colors or truecolor.
+- ``TERM=dumb`` disables the colors.
+- ``COLORTERM=truecolor`` (or ``24bit``) and a ``TERM`` that ends with
+  ``-256color`` or ``-direct`` enable more colors.
+"""
+import os
+import sys
+
+
+NO_COLORS = 0
+COLORS_16 = 16
+COLORS_256 = 256
+TRUECOLOR = 2**24
+
+FORCE_COLOR_LEVELS = {"1": COLORS_16, "2": COLORS_256, "3": TRUECOLOR}
+FALSE_VALUES = ("0", "false", "no", "off")
+
+CACHE_SIZE = 32
+
+# id(stream) -> (stream, color depth)
+_cache = {}
+
+
+def get_color_depth(stream=None):
+    """
+    Returns the number of colors that can be written to the stream
+    (``sys.stdout`` by default): 0, 16, 256 or ``TRUECOLOR``.
+
+    It is detected the first time and then cached for that stream.
+
+    :rtype: int
+    """
+    stream = stream or sys.stdout
+    entry = _cache.get(id(stream))
+    if entry is not None and entry[0] is stream:
+        return entry[1]
+
+    depth = detect_color_depth(stream)
+    if len(_cache) >= CACHE_SIZE:
+        _cache.clear()
+    _cache[id(stream)] = (stream, depth)
+    return depth
+
+
+def supports_color(stream=None):
+    """
+    Whether colors can be written to the stream (``sys.stdout`` by default).
+
+    :rtype: bool
+    """
+    return get_color_depth(stream) > NO_COLORS
+
+
+def invalidate(stream=None):
+    """
+    Forgets the cached color depth of the stream, or of all of them.
+
+    :rtype: None
+    """
+    if stream is None:
+        _cache.clear()
+    else:
+        _cache.pop(id(stream), None)
+
+
+def detect_color_depth(stream, environ=None):
+    """
+    Detects, without caching it, the number of colors that can be written
+    to the stream.
+
+    :rtype: int
+    """
+    environ = os.environ if environ is None else environ
+
+    if environ.get("NO_COLOR"):
+        return NO_COLORS
+
+    force = environ.get("FORCE_COLOR")
+    if force is not None:
+        force = force.strip().lower()
+        if force in FALSE_VALUES:
+            return NO_COLORS
+        if force in FORCE_COLOR_LEVELS:
+            return FORCE_COLOR_LEVELS[force]
+        return max(_term_color_depth(environ), COLORS_16)
+
+    if not _isatty(stream):
+        return NO_COLORS
+    return _term_color_depth(environ)
+
+
+def _isatty(stream):
+    isatty = getattr(stream, "isatty", None)
+    try:
+        return bool(isatty and isatty())
+    except ValueError:  # Closed stream
+        return False
+
+
+def _term_color_depth(environ):
+    term = environ.get("TERM", "").lower()
+    if term == "dumb":
+        return NO_COLORS
+
+    colorterm = environ.get("COLORTERM", "").lower()
+    if colorterm in ("truecolor", "24bit") or term.endswith(("-direct", "-truecolor")):
+        return TRUECOLOR
+    if "256color" in term:
+        return COLORS_256
+    if environ.get("WT_SESSION"):  # Windows Terminal
+        return TRUECOLOR
+    return COLORS_16
@@ -0,0 +1,128 @@
+"""Report where the time of a `Cli` invocation was spent.
+
+Set the `PROPER_CLI_PROFILE` environment variable to enable it:
+
+- `PROPER_CLI_PROFILE=1` reports the time of each phase.
+- `PROPER_CLI_PROFILE=imports` also reports the time spent importing each
+  module imported after `proper_cli`, like `python -X importtime` does.
+
+The report is written to stderr as a single line of JSON.
+"""
+import json
+import os
+import sys
+import time
+import typing as t
+from contextlib import contextmanager, nullcontext
+
+
+PROFILE_ENV = "PROPER_CLI_PROFILE"
+
+_loaded_at = time.perf_counter()
+
+
+class Profiler:
+    def __init__(self, started: float) -> None:
+        self.started = started
+        self.phases: dict[str, float] = {}
+        self.imports: list[tuple[str, float, float]] = []
+        self._import_stack: list[float] = []
+
+    @contextmanager
+    def phase(self, name: str) -> t.Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def mark(self, name: str) -> None:
+        """Record the time since the profiler started as the phase `name`."""
+        self.phases[name] = time.perf_counter() - self.started
+
+    def time_imports(self) -> None:
+        sys.meta_path.insert(0, _ImportTimer(self))
+
+    def report(self, stream: t.Optional[t.TextIO] = None) -> None:
+        data: dict[str, t.Any] = {
+            "argv": sys.argv,
+            "total_ms": _ms(time.perf_counter() - self.started),
+            "cpu_ms": _ms(time.process_time()),
+            "phases": {name: _ms(value) for name, value in self.phases.items()},
+        }
+        if self.imports:
+            data["imports"] = [
+                {"module": name, "self_ms": _ms(own), "cumulative_ms": _ms(total)}
+                for name, own, total in sorted(
+                    self.imports, key=lambda item: item[2], reverse=True
+                )
+            ]
+        stream = stream or sys.stderr
+        stream.write(json.dumps(data) + "\n")
+        stream.flush()
+
+    def _timed_exec(self, name: str, exec_module: t.Callable) -> t.Callable:
+        def timed_exec_module(module):
+            self._import_stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return exec_module(module)
+            finally:
+                total = time.perf_counter() - start
+                children = self._import_stack.pop()
+                if self._import_stack:
+                    self._import_stack[-1] += total
+                self.imports.append((name, total - children, total))
+
+        return timed_exec_module
+
+
+class _ImportTimer:
+    """A meta path finder that finds nothing by itself, but wraps the
+    `exec_module()` of the loaders found by the others to time them."""
+
+    def __init__(self, profiler: Profiler) -> None:
+        self.profiler = profiler
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            loader = spec.loader
+            # Builtin and frozen importers are classes shared by all modules
+            if loader is not None and not isinstance(loader, type):
+                exec_module = getattr(loader, "exec_module", None)
+                if exec_module is not None:
+                    loader.exec_module = self.profiler._timed_exec(
+                        fullname, exec_module
+                    )
+            return spec
+        return None
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def _get_profiler() -> t.Optional[Profiler]:
+    mode = os.environ.get(PROFILE_ENV, "").strip().lower()
+    if not mode or mode in ("0", "false", "no", "off"):
+        return None
+    profiler = Profiler(_loaded_at)
+    if mode == "imports":
+        profiler.time_imports()
+    return profiler
+
+
+profiler = _get_profiler()
+
+
+def profile(name: str) -> t.ContextManager:
+    """Time the block as the phase `name`, if profiling is enabled."""
+    if profiler is None:
+        return nullcontext()
+    return profiler.phase(name)
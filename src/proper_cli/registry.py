@@ -0,0 +1,106 @@
+import importlib
+import typing as t
+from inspect import isclass
+from weakref import WeakKeyDictionary
+
+from .converters import Plan
+
+
+class LazyGroup:
+    """A subgroup that is imported only when is used.
+
+        class Manage(Cli):
+            db = LazyGroup("myapp.cli.db:DBCli", help="Manage the database")
+
+    The list of commands shows it as a single line, with its `help`,
+    instead of listing its commands, so it is not imported.
+
+    Arguments:
+    - path (str): The module and the name of the `Cli` class,
+      separated by a colon.
+    - help (str): A one-line summary of the subgroup, for the list
+      of commands.
+    """
+
+    __slots__ = ("path", "help", "_cls")
+
+    def __init__(self, path: str, help: str = "") -> None:
+        if ":" not in path:
+            raise ValueError(f"Expected a `module:ClassName` path, got `{path}`")
+        self.path = path
+        self.help = help
+        self._cls: t.Optional[type] = None
+
+    @property
+    def module(self) -> str:
+        return self.path.split(":", 1)[0]
+
+    @property
+    def resolved(self) -> bool:
+        return self._cls is not None
+
+    def resolve(self) -> type:
+        """Import the subgroup class, if it hasn't been already, and return it."""
+        if self._cls is None:
+            module_name, qualname = self.path.split(":", 1)
+            obj = importlib.import_module(module_name)
+            for name in qualname.split("."):
+                obj = getattr(obj, name)
+            self._cls = obj
+        return self._cls
+
+    def __repr__(self) -> str:
+        return f"LazyGroup({self.path!r})"
+
+
+def resolve_group(group: t.Union[type, LazyGroup]) -> type:
+    if isinstance(group, LazyGroup):
+        return group.resolve()
+    return group
+
+
+class Registry:
+    """The commands and subgroups of a `Cli` class.
+
+    The class is scanned only once, the first time the registry is
+    requested with `get_registry()`. The help signature, the first
+    line of the docstring and the argument converters of each command
+    are also stored here the first time they are needed, and so is the
+    index of command names used for suggesting the nearest ones.
+    """
+
+    commands: dict[str, t.Any]
+    subgroups: dict[str, t.Union[type, LazyGroup]]
+    params: dict[str, str]
+    summaries: dict[str, str]
+    plans: dict[str, Plan]
+    suggestions: t.Optional[tuple[t.Any, dict[str, list[str]]]]
+
+    def __init__(self, cls: type) -> None:
+        self.commands = {}
+        self.subgroups = {}
+        self.params = {}
+        self.summaries = {}
+        self.plans = {}
+        self.suggestions = None
+
+        for name in dir(cls):
+            if name.startswith("_"):
+                continue
+            attr = getattr(cls, name, None)
+            if isclass(attr) or isinstance(attr, LazyGroup):
+                self.subgroups[name] = attr
+            else:
+                self.commands[name] = attr
+
+
+_registries: "WeakKeyDictionary[type, Registry]" = WeakKeyDictionary()
+
+
+def get_registry(cls: type) -> Registry:
+    """Return the registry of the `Cli` class `cls`, building it
+    if this is the first time it is requested."""
+    registry = _registries.get(cls)
+    if registry is None:
+        registry = _registries[cls] = Registry(cls)
+    return registry
@@ -0,0 +1,508 @@
+"""Keep a `Cli` loaded in memory to skip the start-up of the next runs.
+
+Point the entry point of your program to `run()` with the import path of
+your `Cli` instance:
+
+    # myapp/client.py
+    from proper_cli.server import run
+
+    def main():
+        run("myapp.cli:cli")
+
+The first time, `run()` imports the `Cli`, forks a server in the background
+and runs the command as usual. The next times, it sends the arguments, the
+working directory, the environment and the standard streams to the server
+through a Unix socket, and the command runs in a worker already forked from
+the server, with all the modules already imported.
+
+The server stops after `idle_timeout` seconds without requests, or when one
+of the source files of the `Cli` changes. Set `PROPER_CLI_SERVER=0` to
+disable it. It is not available on systems without `fork()`, Unix sockets
+or a way to check the user of a connection, where `run()` just runs the
+command.
+
+The socket is only used if its directory is private to the user, and both
+ends of a connection check that the other one runs as the same user, since
+the client sends its environment and its standard streams. A server holds a
+lock file while it runs, and only the one holding it creates or removes
+the socket. If no worker answers in `REPLY_TIMEOUT` seconds, the client
+runs the command itself.
+
+This module only imports the standard library until it has to start or
+run a server, so a client doesn't pay for importing the rest of
+`proper_cli`.
+"""
+import hashlib
+import importlib
+import json
+import os
+import select
+import signal
+import socket
+import stat
+import struct
+import sys
+import time
+import typing as t
+
+
+__all__ = ("run", "stop", "get_socket_path")
+
+SERVER_ENV = "PROPER_CLI_SERVER"
+RUNTIME_DIR_ENV = "PROPER_CLI_RUNTIME_DIR"
+IDLE_TIMEOUT = 15 * 60
+# Seconds to wait for a worker to take a request
+REPLY_TIMEOUT = 2.0
+# Seconds a new server waits for the previous one to release the lock
+LOCK_TIMEOUT = 2.0
+# Seconds between checks that the spare worker is still alive
+CHECK_INTERVAL = 1.0
+HEADER = struct.Struct("!I")
+# `struct ucred` on Linux and `struct xucred` on macOS
+PEERCRED = struct.Struct("3i")
+XUCRED = struct.Struct("2I")
+XUCRED_SIZE = 76
+SOL_LOCAL = 0
+FORWARDED_SIGNALS = ("SIGINT", "SIGTERM", "SIGHUP", "SIGQUIT")
+
+# Messages from a worker to the server
+ACCEPTED = b"a"
+REJECTED = b"r"
+STALE = b"s"
+SHUTDOWN = b"q"
+
+# From the client to the worker, after the worker sent its pid
+GO = b"go\n"
+
+
+def is_available() -> bool:
+    return (
+        hasattr(os, "fork")
+        and hasattr(socket, "AF_UNIX")
+        and hasattr(socket, "send_fds")
+        and (hasattr(socket, "SO_PEERCRED") or hasattr(socket, "LOCAL_PEERCRED"))
+    )
+
+
+def get_socket_path(target: str) -> t.Optional[str]:
+    """Return the path of the socket of the server of `target`, or `None`
+    if its directory is not private to the user."""
+    base = os.environ.get(RUNTIME_DIR_ENV) or os.environ.get("XDG_RUNTIME_DIR")
+    if not base:
+        import tempfile
+
+        base = os.path.join(tempfile.gettempdir(), f"proper-cli-{os.getuid()}")
+    try:
+        os.makedirs(base, mode=0o700, exist_ok=True)
+    except OSError:
+        return None
+    if not is_private_dir(base):
+        return None
+
+    key = "\n".join([target, sys.executable, os.path.abspath(sys.argv[0])])
+    digest = hashlib.sha1(key.encode("utf8")).hexdigest()[:16]
+    return os.path.join(base, f"proper-cli-{digest}.sock")
+
+
+def is_private_dir(path: str) -> bool:
+    """Check that `path` is a directory, not a symlink, owned by the user
+    and that nobody else can read or write to."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return (
+        stat.S_ISDIR(st.st_mode)
+        and st.st_uid == os.getuid()
+        and st.st_mode & 0o077 == 0
+    )
+
+
+def get_peer_uid(conn: socket.socket) -> t.Optional[int]:
+    """Return the user id of the process at the other end of the Unix
+    socket `conn`, or `None` if it can't be known."""
+    try:
+        if hasattr(socket, "SO_PEERCRED"):
+            creds = conn.getsockopt(
+                socket.SOL_SOCKET, socket.SO_PEERCRED, PEERCRED.size
+            )
+            return PEERCRED.unpack(creds)[1]
+        if hasattr(socket, "LOCAL_PEERCRED"):
+            creds = conn.getsockopt(SOL_LOCAL, socket.LOCAL_PEERCRED, XUCRED_SIZE)
+            return XUCRED.unpack_from(creds)[1]
+    except OSError:
+        pass
+    return None
+
+
+def run(target: str, idle_timeout: float = IDLE_TIMEOUT) -> None:
+    """Run the command in the server of `target` or, if it isn't running,
+    start it and run the command in this process.
+
+    Arguments:
+    - target (str): The import path of the `Cli` instance, as `module:name`.
+    - idle_timeout (float): Seconds without requests before the server stops.
+    """
+    if not is_available() or os.environ.get(SERVER_ENV, "1") == "0":
+        return _load(target)()
+
+    path = get_socket_path(target)
+    if path is None:
+        return _load(target)()
+    code = _request(path, sys.argv)
+    if code is not None:
+        sys.exit(code)
+
+    cli = _load(target)
+    _start_server(cli, path, idle_timeout)
+    cli()
+
+
+def stop(target: str) -> bool:
+    """Stop the server of `target`. Return whether it was running."""
+    path = get_socket_path(target)
+    return path is not None and _request(path, None) is not None
+
+
+def _load(target: str) -> t.Callable[[], None]:
+    module_name, name = target.split(":", 1)
+    obj: t.Any = importlib.import_module(module_name)
+    for attr in name.split("."):
+        obj = getattr(obj, attr)
+    return obj
+
+
+# Client
+
+
+def _request(path: str, argv: t.Optional[list[str]]) -> t.Optional[int]:
+    """Send the request to the server and wait for the exit code.
+    Return `None` if the server is not running, is outdated or doesn't
+    answer in time.
+
+    The socket is never removed here: a new server could have just
+    created it. The server that replaces a dead one removes it.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(REPLY_TIMEOUT)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+
+    with sock:
+        if get_peer_uid(sock) != os.getuid():
+            return None
+        if argv is None:
+            payload = {"shutdown": True}
+        else:
+            payload = {"argv": argv, "cwd": os.getcwd(), "env": dict(os.environ)}
+        data = json.dumps(payload).encode("utf8")
+        try:
+            socket.send_fds(sock, [HEADER.pack(len(data)) + data], [0, 1, 2])
+        except OSError:
+            return None
+        return _wait_for_exit(sock)
+
+
+def _wait_for_exit(sock: socket.socket) -> t.Optional[int]:
+    reader = sock.makefile("rb")
+    pid = None
+    previous = {}
+    try:
+        for line in reader:
+            word, _, value = line.decode("utf8").strip().partition(" ")
+            if word == "stale":
+                # The server stops, and the next one takes its place
+                return None
+            if word == "pid":
+                pid = int(value)
+                previous = _forward_signals(pid)
+                # The worker doesn't run the command until it knows that
+                # this client hasn't given up waiting
+                sock.sendall(GO)
+                sock.settimeout(None)
+            elif word == "exit":
+                return int(value)
+        return 1 if pid else None
+    except OSError:
+        # Including the timeout waiting for a worker
+        return 1 if pid else None
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+
+
+def _forward_signals(pid: int) -> dict:
+    def forward(signum, frame):
+        try:
+            os.kill(pid, signum)
+        except OSError:
+            pass
+
+    previous = {}
+    for name in FORWARDED_SIGNALS:
+        signum = getattr(signal, name, None)
+        if signum is not None:
+            previous[signum] = signal.signal(signum, forward)
+    return previous
+
+
+def _remove_socket(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _lock(path: str, timeout: float) -> t.Optional[int]:
+    """Take the lock of the server at `path`, waiting up to `timeout`
+    seconds for another server to release it. Return the file descriptor
+    that holds it, or `None` if another server is still running."""
+    import fcntl
+
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return fd
+        except OSError:
+            if time.monotonic() >= deadline:
+                os.close(fd)
+                return None
+            time.sleep(0.05)
+
+
+# Server
+
+
+def _start_server(cli: t.Callable[[], None], path: str, idle_timeout: float) -> None:
+    """Fork a daemon that serves `cli`. Return in the original process."""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid:
+        os.waitpid(pid, 0)
+        return
+
+    # First child: detach from the terminal and fork the daemon
+    try:
+        os.setsid()
+        if os.fork():
+            os._exit(0)
+        _daemonize()
+        _Server(cli, path, idle_timeout).serve()
+    except BaseException:
+        pass
+    os._exit(0)
+
+
+def _daemonize() -> None:
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    os.close(devnull)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+class _Server:
+    def __init__(
+        self,
+        cli: t.Callable[[], None],
+        path: str,
+        idle_timeout: float,
+    ) -> None:
+        self.cli = cli
+        self.path = path
+        self.idle_timeout = idle_timeout
+        from .help_cache import get_source_files
+
+        self.files = get_source_files(type(cli))
+        self.lock = -1
+
+    def serve(self) -> None:
+        # Held until the server stops, and released by the system if it dies
+        lock = _lock(self.path + ".lock", LOCK_TIMEOUT)
+        if lock is None:
+            # Another server is already running
+            return
+        self.lock = lock
+        spare = 0
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            # Only the server holding the lock creates the socket, so one
+            # found here is from a server that is gone
+            _remove_socket(self.path)
+            sock.bind(self.path)
+            sock.listen(64)
+            spare = self._serve(sock)
+        finally:
+            _remove_socket(self.path)
+            sock.close()
+            os.close(lock)
+            if spare:
+                try:
+                    os.kill(spare, signal.SIGTERM)
+                except OSError:
+                    pass
+
+    def _serve(self, sock: socket.socket) -> int:
+        """Keep a worker ready for each request until the server is idle
+        for `idle_timeout` seconds or has to stop. Return the pid of the
+        worker left waiting."""
+        notify_r, notify_w = os.pipe()
+        spare = self._fork_worker(sock, notify_r, notify_w)
+        idle_since = time.monotonic()
+        while True:
+            timeout = idle_since + self.idle_timeout - time.monotonic()
+            if timeout <= 0:
+                return spare
+            ready, _, _ = select.select(
+                [notify_r], [], [], min(timeout, CHECK_INTERVAL)
+            )
+            reaped = self._reap()
+            if ready:
+                message = os.read(notify_r, 1)
+                if message not in (ACCEPTED, REJECTED):
+                    return spare
+                idle_since = time.monotonic()
+            elif spare not in reaped or select.select([notify_r], [], [], 0)[0]:
+                continue
+            # Keep a worker ready for the next request, or replace the
+            # one that died without taking a request
+            spare = self._fork_worker(sock, notify_r, notify_w)
+
+    def _fork_worker(self, sock: socket.socket, notify_r: int, notify_w: int) -> int:
+        pid = os.fork()
+        if pid:
+            return pid
+
+        code = 0
+        try:
+            os.close(self.lock)
+            os.close(notify_r)
+            code = _Worker(self.cli, self.files).handle(sock, notify_w)
+        except BaseException:
+            code = 1
+        os._exit(code)
+
+    def _reap(self) -> set[int]:
+        """Collect the workers that have ended and return their pids."""
+        reaped = set()
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return reaped
+            if not pid:
+                return reaped
+            reaped.add(pid)
+
+
+class _Worker:
+    def __init__(self, cli: t.Callable[[], None], files: dict[str, int]) -> None:
+        self.cli = cli
+        self.files = files
+
+    def handle(self, sock: socket.socket, notify_w: int) -> int:
+        from .help_cache import is_fresh
+        from .pastel import terminal
+
+        conn, _ = sock.accept()
+        sock.close()
+        if get_peer_uid(conn) != os.getuid():
+            os.write(notify_w, REJECTED)
+            conn.close()
+            return 1
+        request, fds = self._receive(conn)
+
+        if request.get("shutdown"):
+            os.write(notify_w, SHUTDOWN)
+            conn.sendall(b"exit 0\n")
+            return 0
+        if not is_fresh(self.files):
+            os.write(notify_w, STALE)
+            conn.sendall(b"stale\n")
+            return 0
+
+        os.write(notify_w, ACCEPTED)
+        os.close(notify_w)
+        conn.sendall(f"pid {os.getpid()}\n".encode("utf8"))
+        if not self._client_is_waiting(conn):
+            for fd in fds:
+                os.close(fd)
+            return 1
+
+        for target, fd in zip((0, 1, 2), fds):  # noqa: B905
+            os.dup2(fd, target)
+            os.close(fd)
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+        sys.argv = request["argv"]
+        # The streams and the environment are not the server's anymore
+        terminal.invalidate()
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+        code = self._run()
+        conn.sendall(f"exit {code}\n".encode("utf8"))
+        return code
+
+    def _run(self) -> int:
+        import traceback
+
+        from .output import get_sink
+
+        code = 0
+        try:
+            self.cli()
+        except SystemExit as exit:
+            code = _exit_code(exit.code)
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            try:
+                get_sink().flush()
+                sys.stdout.flush()
+                sys.stderr.flush()
+            except OSError:
+                pass
+        return code
+
+    def _client_is_waiting(self, conn: socket.socket) -> bool:
+        """Wait for the client to confirm that it is still waiting for
+        this worker, and hasn't run the command itself."""
+        conn.settimeout(REPLY_TIMEOUT)
+        try:
+            return conn.recv(len(GO)) == GO
+        except OSError:
+            return False
+        finally:
+            conn.settimeout(None)
+
+    def _receive(self, conn: socket.socket) -> tuple[dict, list[int]]:
+        data, fds, _, _ = socket.recv_fds(conn, 65536, 3)
+        while len(data) < HEADER.size:
+            data += conn.recv(65536)
+        (size,) = HEADER.unpack(data[: HEADER.size])
+        data = data[HEADER.size :]
+        while len(data) < size:
+            chunk = conn.recv(max(size - len(data), 65536))
+            if not chunk:
+                break
+            data += chunk
+        return json.loads(data.decode("utf8")), fds
+
+
+def _exit_code(code: t.Any) -> int:
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    sys.stderr.write(f"{code}\n")
+    return 1
@@ -0,0 +1,198 @@
+"""Suggest the commands nearest to an unknown one, for the
+"Did you mean?" message.
+
+The names of the commands of a `Cli` class and of its subgroups are
+indexed the first time they are needed, with the paths they can be found
+at, like "db migrate". A lookup only compares the name with the few of
+them that could be close enough, instead of with the whole command tree.
+Lazy subgroups are suggested by name only, to not import them.
+"""
+import typing as t
+
+from .registry import LazyGroup, get_registry
+
+
+__all__ = ("WordIndex", "get_suggestions", "edit_distance")
+
+MAX_SUGGESTIONS = 5
+MAX_DEPTH = 10
+
+
+def _count_bits_slow(n: int) -> int:
+    return bin(n).count("1")
+
+
+# `int.bit_count()` is new in Python 3.10
+_count_bits: t.Callable[[int], int] = getattr(int, "bit_count", _count_bits_slow)
+
+
+class WordIndex:
+    """An index of words, for finding the ones within some edit distance
+    of a word.
+
+    The words are bucketed by length, and then by the set of characters
+    they use, as a bit mask. Each edit changes the length by at most one
+    and adds or removes at most one character from the set, so a search
+    only computes the distance to the words of the buckets that could be
+    within `max_distance`.
+    """
+
+    __slots__ = ("buckets", "size")
+
+    def __init__(self, words: t.Iterable[str] = ()) -> None:
+        # length -> characters mask -> words
+        self.buckets: dict[int, dict[int, list[str]]] = {}
+        self.size = 0
+        for word in words:
+            self.add(word)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, word: str) -> None:
+        words = self.buckets.setdefault(len(word), {}).setdefault(
+            _get_mask(word), []
+        )
+        if word not in words:
+            words.append(word)
+            self.size += 1
+
+    def search(self, word: str, max_distance: int) -> list[tuple[int, str]]:
+        """Return the `(distance, word)` pairs of the words within
+        `max_distance` of `word`, nearest first."""
+        found = []
+        pattern, length = _get_pattern(word), len(word)
+        mask = _get_mask(word)
+        for size in range(max(length - max_distance, 0), length + max_distance + 1):
+            for other_mask, words in self.buckets.get(size, {}).items():
+                diff = mask ^ other_mask
+                if (
+                    _count_bits(diff & mask) > max_distance
+                    or _count_bits(diff & other_mask) > max_distance
+                ):
+                    continue
+                for other in words:
+                    distance = _distance(pattern, length, other, max_distance)
+                    if distance <= max_distance:
+                        found.append((distance, other))
+        found.sort()
+        return found
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Return the number of insertions, deletions, substitutions and
+    transpositions of adjacent characters needed to turn `a` into `b`,
+    if no substring is edited more than once (the optimal string
+    alignment distance)."""
+    return _distance(_get_pattern(a), len(a), b)
+
+
+def _get_mask(word: str) -> int:
+    """The bit mask of the characters used in `word`. Characters with
+    the same bit are taken as the same one, which only lets more words
+    through a search."""
+    mask = 0
+    for char in word:
+        mask |= 1 << (ord(char) & 63)
+    return mask
+
+
+def _get_pattern(word: str) -> dict[str, int]:
+    """The bit mask of the positions of each character in `word`."""
+    pattern: dict[str, int] = {}
+    for i, char in enumerate(word):
+        pattern[char] = pattern.get(char, 0) | (1 << i)
+    return pattern
+
+
+def _distance(
+    pattern: dict[str, int],
+    length: int,
+    text: str,
+    max_distance: t.Optional[int] = None,
+) -> int:
+    """The optimal string alignment distance between the word of
+    `pattern`, of `length` characters, and `text`. If `max_distance` is
+    given, stop at `max_distance + 1` as soon as the distance is known to
+    be over it.
+
+    This is the bit-parallel algorithm of Myers, with the transpositions
+    of Hyyrö: each bit of `pv`/`mv` tells if a cell of the current column
+    of the dynamic programming table is one more/less than the cell above
+    it, so a whole column is computed with a few operations on integers.
+    """
+    if not length:
+        return len(text)
+    mask = (1 << length) - 1
+    last = 1 << (length - 1)
+    pv, mv, score = mask, 0, length
+    d0 = previous_eq = 0
+    limit = length + len(text) if max_distance is None else max_distance
+    remaining = len(text)
+    for char in text:
+        eq = pattern.get(char, 0)
+        # The cells where swapping this character and the previous one
+        # continues a diagonal of matches
+        tr = (((~d0) & eq) << 1) & previous_eq
+        d0 = (((eq & pv) + pv) ^ pv) | eq | mv | tr
+        ph = mv | ~(d0 | pv)
+        mh = pv & d0
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        # Each character left can lower the score by one at most
+        remaining -= 1
+        if score - remaining > limit:
+            return limit + 1
+        ph = (ph << 1) | 1
+        mh <<= 1
+        pv = (mh | ~(d0 | ph)) & mask
+        mv = ph & d0 & mask
+        previous_eq = eq
+    return score
+
+
+def get_suggestions(cls: type, name: str, limit: int = MAX_SUGGESTIONS) -> list[str]:
+    """Return the paths of up to `limit` commands or subgroups of the
+    `Cli` class `cls`, or of its subgroups, with a name close to `name`.
+
+    For example, "migrat" can suggest both "migrate" and "db migrate".
+    """
+    index, paths = _get_index(cls)
+    max_distance = get_max_distance(name)
+
+    suggestions: list[str] = []
+    for _, key in index.search(name, max_distance):
+        for path in paths[key]:
+            if path not in suggestions:
+                suggestions.append(path)
+    return suggestions[:limit]
+
+
+def get_max_distance(name: str) -> int:
+    """How different can a name be from a command to still suggest it:
+    one typo in a short name, two in a longer one."""
+    return 1 if len(name) <= 3 else 2
+
+
+def _get_index(cls: type) -> tuple[WordIndex, dict[str, list[str]]]:
+    registry = get_registry(cls)
+    if registry.suggestions is None:
+        paths: dict[str, list[str]] = {}
+        for path in _iter_paths(cls, "", 0):
+            name = path.rsplit(" ", 1)[-1]
+            paths.setdefault(name, []).append(path)
+        registry.suggestions = (WordIndex(paths), paths)
+    return registry.suggestions
+
+
+def _iter_paths(cls: type, prefix: str, depth: int) -> t.Iterator[str]:
+    registry = get_registry(cls)
+    for name in registry.commands:
+        yield f"{prefix}{name}"
+    for name, group in registry.subgroups.items():
+        yield f"{prefix}{name}"
+        if isinstance(group, LazyGroup) or depth >= MAX_DEPTH:
+            continue
+        yield from _iter_paths(group, f"{prefix}{name} ", depth + 1)
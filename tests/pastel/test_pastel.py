@@ -23,6 +23,8 @@ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 import pytest
 
+from proper_cli.pastel import Pastel
+
 
 def test_empty_tag(pastel):
     assert "foo<>bar" == pastel.colorize("foo<>bar")
@@ -190,3 +192,222 @@ def test_non_decorated_pastel(non_decorated_pastel):
 )
 def test_content_with_line_breaks(pastel, expected, message):
     assert expected == pastel.colorize(message)
+
+
+def test_compiled_cache(pastel):
+    pastel.cache_clear()
+
+    pastel.colorize("<info>some info</info>")
+    pastel.colorize("<info>some info</info>")
+    info = pastel.cache_info()
+    assert info.hits == 1
+    assert info.misses == 1
+
+    pastel.with_colors(False)
+    assert "some info" == pastel.colorize("<info>some info</info>")
+    assert pastel.cache_info().misses == 2
+
+
+def test_cache_cleared_on_new_style(pastel):
+    assert "<test>msg</test>" == pastel.colorize("<test>msg</test>")
+    pastel.add_style("test", "blue")
+    assert "\033[34mmsg\033[0m" == pastel.colorize("<test>msg</test>")
+
+
+def test_cache_cleared_on_changed_style(pastel):
+    assert "\033[32mmsg\033[0m" == pastel.colorize("<info>msg</info>")
+    pastel.style("info").set_foreground("red")
+    assert "\033[31mmsg\033[0m" == pastel.colorize("<info>msg</info>")
+    pastel.style("info").set_option("bold")
+    assert "\033[31;1mmsg\033[0m" == pastel.colorize("<info>msg</info>")
+
+    style = pastel.style("info")
+    pastel.remove_style("info")
+    pastel.colorize("<comment>msg</comment>")
+    style.set_foreground("blue")
+    assert pastel.cache_info().currsize == 1
+
+
+def test_compile_template(pastel):
+    markup = pastel.compile("<info>{name}</info> has {count} items")
+
+    assert "\033[32mfoo\033[0m has 3 items" == markup.render(name="foo", count=3)
+    assert "\033[32m<b>\033[0m has 0 items" == markup.render(name="<b>", count=0)
+    assert [("{name}", "\033[32m"), (" has {count} items", "")] == list(
+        markup.segments
+    )
+
+
+def test_escaped_tag_inside_style(pastel):
+    assert "\033[32mfoo \033[0m\033[32m<b>\033[0m\033[32m bar\033[0m" == pastel.colorize(
+        "<info>foo \\<b> bar</info>"
+    )
+
+
+def test_inline_styles_are_interned(pastel):
+    style = pastel._create_style_from_string("fg=blue;bg=red")
+    assert style is pastel._create_style_from_string("fg=blue;bg=red")
+    assert pastel._create_style_from_string("nope") is False
+
+    pastel.add_style("nope", "blue")
+    assert pastel._create_style_from_string("nope") is pastel.style("nope")
+
+    pastel.remove_style("nope")
+    assert pastel._create_style_from_string("nope") is False
+
+
+def test_colorize_from_many_threads(pastel):
+    import sys
+    import threading
+
+    messages = [
+        f"<info>info {i} <fg=blue;options=bold>bold {i}</> plain</info> <comment>{i}</>"
+        for i in range(50)
+    ]
+    # Compile without the cache so every call walks the tags
+    pastel.CACHE_MAX_LENGTH = 0
+    expected = {
+        colorized: [pastel.colorize(message, colorized) for message in messages]
+        for colorized in (True, False)
+    }
+    errors = []
+
+    def work(colorized):
+        try:
+            for _ in range(40):
+                for message, text in zip(messages, expected[colorized]):  # noqa: B905
+                    assert pastel.colorize(message, colorized) == text
+        except Exception as error:
+            errors.append(error)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [
+            threading.Thread(target=work, args=(i % 2 == 0,)) for i in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert not errors
+    assert pastel.is_colorized()
+
+
+def test_plain_text_fast_path(pastel):
+    pastel.cache_clear()
+    message = "no tags \\ here {name}"
+
+    assert pastel.colorize(message) is message
+    assert pastel.compile(message).render(name="x") == "no tags \\ here x"
+    assert list(pastel.compile("").segments) == []
+    assert pastel.cache_info().currsize == 0
+
+
+def styled_chars(text):
+    """The visible characters of the text with the escape sequences
+    that apply to each one, no matter how the sequences are split."""
+    import re
+
+    chars = []
+    current = ""
+    for part in re.split("(\033\\[[0-9;]*m)", text):
+        if part.startswith("\033["):
+            current = "" if part == "\033[0m" else current + part
+        else:
+            chars.extend((char, current) for char in part)
+    return chars
+
+
+STREAMED = (
+    "<info>foo \\<b> bar</info> a < b <fg=blue;options=bold>bold\n"
+    "line <comment>two</comment></>\\<x> <nope>end</nope> \\"
+)
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 8, 13, 1000])
+def test_colorize_stream(pastel, size):
+    chunks = [STREAMED[i : i + size] for i in range(0, len(STREAMED), size)]
+
+    streamed = "".join(pastel.colorize_stream(chunks))
+    assert styled_chars(streamed) == styled_chars(pastel.colorize(STREAMED))
+
+    plain = "".join(pastel.colorize_stream(chunks, colorized=False))
+    assert plain == pastel.colorize(STREAMED, colorized=False)
+
+
+def test_colorize_stream_is_lazy(pastel):
+    def chunks():
+        yield "<info>first"
+        raise AssertionError("read too soon")
+
+    assert next(pastel.colorize_stream(chunks())) == "\033[32mfirst\033[0m"
+
+
+def test_hex_and_palette_colors():
+    pastel = Pastel(True, color_depth=2**24)
+    assert "\033[38;2;255;136;0mhot\033[0m" == pastel.colorize("<fg=#ff8800>hot</>")
+    assert "\033[48;5;208mhot\033[0m" == pastel.colorize("<bg=color(208)>hot</>")
+
+    pastel = Pastel(True, color_depth=16)
+    assert "\033[91mhot\033[0m" == pastel.colorize("<fg=#ff0000>hot</>")
+
+
+def test_color_depth_from_terminal(monkeypatch):
+    from proper_cli.pastel import terminal
+
+    pastel = Pastel(True)
+    pastel.add_style("hot", "#ff0000")
+    monkeypatch.setattr(terminal, "_cache", {})
+    monkeypatch.setenv("FORCE_COLOR", "3")
+    assert "\033[38;2;255;0;0mhot\033[0m" == pastel.colorize("<hot>hot</hot>")
+
+    monkeypatch.setenv("FORCE_COLOR", "1")
+    terminal.invalidate()
+    assert "\033[91mhot\033[0m" == pastel.colorize("<hot>hot</hot>")
+
+
+def test_color_depth_does_not_change_the_styles():
+    import sys
+    import threading
+
+    pastel = Pastel(True)
+    pastel.add_style("hot", "#ff0000")
+    hot = pastel.style("hot")
+    expected = {
+        2**24: "\033[38;2;255;0;0mhot\033[0m \033[38;2;255;0;0mhot\033[0m",
+        16: "\033[91mhot\033[0m \033[91mhot\033[0m",
+    }
+    # Each thread sees a different terminal
+    local = threading.local()
+    pastel.color_depth = lambda: local.depth
+    pastel.CACHE_MAX_LENGTH = 0
+    errors = []
+
+    def work(depth):
+        local.depth = depth
+        try:
+            for _ in range(200):
+                text = pastel.colorize("<hot>hot</hot> <fg=#ff0000>hot</>")
+                assert text == expected[depth]
+        except Exception as error:
+            errors.append(error)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=work, args=(depth,)) for depth in expected]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert not errors
+    # The named style is not downsampled in place
+    assert pastel.style("hot") is hot
+    assert hot.color_depth is None
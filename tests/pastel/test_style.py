@@ -68,3 +68,67 @@ def test_options(style):
         style.unset_option("foo")
 
     assert 'Invalid option specified: "foo"' in str(e.value)
+
+
+def test_sequences(style):
+    assert "" == style.open_sequence
+    assert "" == style.reset_sequence
+
+    style.set_foreground("green")
+    style.set_option("bold")
+    assert "\033[32;1m" == style.open_sequence
+    assert "\033[0m" == style.reset_sequence
+
+    style.unset_option("bold")
+    assert "\033[32m" == style.open_sequence
+
+    with pytest.raises(AttributeError):
+        style.open_sequence = ""
+
+
+def test_hex_and_palette_colors():
+    assert "\033[38;2;255;136;0m" == Style("#ff8800").open_sequence
+    assert "\033[48;2;255;136;0m" == Style(None, "#F80").open_sequence
+    assert "\033[38;5;208m" == Style("color(208)").open_sequence
+    assert "\033[48;5;208m" == Style(None, "color(208)").open_sequence
+    assert "\033[91m" == Style("color(9)").open_sequence
+
+    with pytest.raises(ValueError):
+        Style("#ff88")
+    with pytest.raises(ValueError):
+        Style("color(256)")
+
+
+def test_color_depth():
+    style = Style("#ff8800", "#000000", color_depth=256)
+    assert "\033[38;5;208;48;5;16m" == style.open_sequence
+
+    style.set_color_depth(16)
+    assert "\033[33;40m" == style.open_sequence  # Orange is closer to yellow
+
+    style.set_color_depth(None)
+    assert "\033[38;2;255;136;0;48;2;0;0;0m" == style.open_sequence
+
+    # Basic colors are the same at any depth
+    assert "\033[31m" == Style("red", color_depth=16).open_sequence
+
+
+def test_downsample_tables():
+    import random
+
+    from proper_cli.pastel.colors import NEAREST_16, PALETTE_256, rgb_to_256
+
+    def distance(a, b):
+        return sum((x - y) ** 2 for x, y in zip(a, b))  # noqa: B905
+
+    rand = random.Random(42)
+    for _ in range(500):
+        rgb = tuple(rand.randrange(256) for _ in range(3))
+        nearest = min(range(16, 256), key=lambda i: distance(rgb, PALETTE_256[i]))
+        assert distance(rgb, PALETTE_256[rgb_to_256(*rgb)]) == distance(
+            rgb, PALETTE_256[nearest]
+        )
+
+    assert NEAREST_16[196] == 9  # Bright red
+    assert NEAREST_16[16] == 0  # Black
+    assert all(NEAREST_16[i] == i for i in range(16))
@@ -0,0 +1,77 @@
+import io
+
+import pytest
+
+from proper_cli.pastel import terminal
+from proper_cli.pastel.terminal import (
+    COLORS_16,
+    COLORS_256,
+    NO_COLORS,
+    TRUECOLOR,
+    detect_color_depth,
+)
+
+
+class TTY(io.StringIO):
+    calls = 0
+
+    def isatty(self):
+        self.calls += 1
+        return True
+
+
+@pytest.mark.parametrize(
+    "environ, expected",
+    [
+        ({}, COLORS_16),
+        ({"TERM": "xterm"}, COLORS_16),
+        ({"TERM": "xterm-256color"}, COLORS_256),
+        ({"TERM": "xterm", "COLORTERM": "truecolor"}, TRUECOLOR),
+        ({"TERM": "xterm-direct"}, TRUECOLOR),
+        ({"TERM": "dumb"}, NO_COLORS),
+        ({"TERM": "xterm", "NO_COLOR": "1"}, NO_COLORS),
+        ({"TERM": "xterm", "NO_COLOR": ""}, COLORS_16),
+        ({"TERM": "xterm-256color", "FORCE_COLOR": "0"}, NO_COLORS),
+    ],
+)
+def test_detect_tty(environ, expected):
+    assert detect_color_depth(TTY(), environ) == expected
+
+
+@pytest.mark.parametrize(
+    "environ, expected",
+    [
+        ({"TERM": "xterm-256color"}, NO_COLORS),
+        ({"FORCE_COLOR": "1"}, COLORS_16),
+        ({"FORCE_COLOR": "3"}, TRUECOLOR),
+        ({"FORCE_COLOR": "", "TERM": "xterm-256color"}, COLORS_256),
+        ({"FORCE_COLOR": "true", "TERM": "dumb"}, COLORS_16),
+        ({"FORCE_COLOR": "1", "NO_COLOR": "1"}, NO_COLORS),
+    ],
+)
+def test_detect_not_tty(environ, expected):
+    assert detect_color_depth(io.StringIO(), environ) == expected
+
+
+def test_cached_per_stream(monkeypatch):
+    monkeypatch.setenv("TERM", "xterm-256color")
+    monkeypatch.delenv("NO_COLOR", raising=False)
+    monkeypatch.delenv("FORCE_COLOR", raising=False)
+    monkeypatch.delenv("COLORTERM", raising=False)
+    stream = TTY()
+    other = TTY()
+
+    assert terminal.get_color_depth(stream) == COLORS_256
+    assert terminal.get_color_depth(stream) == COLORS_256
+    assert stream.calls == 1
+    assert terminal.supports_color(other)
+
+    monkeypatch.setenv("NO_COLOR", "1")
+    assert terminal.supports_color(stream)
+    terminal.invalidate(stream)
+    assert not terminal.supports_color(stream)
+    assert stream.calls == 1
+    assert terminal.supports_color(other)
+
+    terminal.invalidate()
+    assert not terminal.supports_color(other)
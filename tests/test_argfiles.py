@@ -0,0 +1,60 @@
+import sys
+
+from proper_cli import Cli
+from proper_cli.argfiles import expand_argfiles, read_argfile
+
+
+def test_read_argfile(tmp_path):
+    path = tmp_path / "args.txt"
+    path.write_text(
+        'one two\n'
+        '"three four" five\\ six\n'
+        "'seven \"eight\"' \"nine \\\"ten\\\"\"\n"
+        "--opt=a\\\\b\n"
+        "  \n"
+        'unbalanced" end\n'
+    )
+    assert list(read_argfile(path)) == [
+        "one",
+        "two",
+        "three four",
+        "five six",
+        'seven "eight"',
+        'nine "ten"',
+        "--opt=a\\b",
+        'unbalanced"',
+        "end",
+    ]
+
+
+def test_empty_argfile(tmp_path):
+    path = tmp_path / "args.txt"
+    path.write_text("")
+    assert list(read_argfile(path)) == []
+
+
+def test_expand_argfiles(tmp_path):
+    path = tmp_path / "args.txt"
+    path.write_text("b\nc\n")
+    argv = ["a", f"@{path}", "d", "@nope", "@"]
+    assert list(expand_argfiles(argv)) == ["a", "b", "c", "d", "@nope", "@"]
+
+
+def test_stdin_argfile(tmp_path, monkeypatch):
+    path = tmp_path / "args.txt"
+    path.write_text("b c\n")
+    with open(path) as stdin:
+        monkeypatch.setattr(sys, "stdin", stdin)
+        assert list(expand_argfiles(["a", "@-"])) == ["a", "b", "c"]
+
+
+def test_cli_argfile(tmp_path, capsys):
+    class Manage(Cli):
+        def process(self, *paths, jobs=1):
+            print(paths, jobs)
+
+    path = tmp_path / "files.txt"
+    path.write_text("\n".join(f"file{i}.txt" for i in range(3)))
+    sys.argv = ["manage.py", "process", f"@{path}", "--jobs", "2"]
+    Manage()()
+    assert capsys.readouterr().out == "('file0.txt', 'file1.txt', 'file2.txt') 2\n"
@@ -0,0 +1,154 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from proper_cli import Cli, batchable, echo
+
+
+class Images(Cli):
+    @batchable(jobs=4)
+    def resize(self, size: int, label="px"):
+        """RESIZE"""
+        if size == 13:
+            raise ValueError("unlucky")
+        echo(f"start {size}")
+        time.sleep(0.01)
+        echo(f"done {size}{label}")
+
+    @batchable
+    def threads(self, name):
+        echo(threading.current_thread().name)
+
+    @batchable(processes=True)
+    def pids(self, n):
+        echo(f"{n} {os.getpid()}")
+
+
+def test_batch(capsys):
+    sys.argv = ["manage.py", "resize", "1", "2", "3", "4", "5", "--label=em"]
+    Images()()
+    lines = capsys.readouterr().out.splitlines()
+
+    assert len(lines) == 10
+    # The output of each run is not interleaved with the others
+    for start, done in zip(lines[::2], lines[1::2]):  # noqa: B905
+        size = start.split()[1]
+        assert start == f"start {size}"
+        assert done == f"done {size}em"
+    assert sorted(line for line in lines if line.startswith("done")) == [
+        f"done {size}em" for size in range(1, 6)
+    ]
+
+
+def test_batch_jobs(capsys):
+    sys.argv = ["manage.py", "threads", "a", "b", "c", "--jobs=1"]
+    Images()()
+    names = set(capsys.readouterr().out.split())
+    assert names == {threading.current_thread().name}
+
+    sys.argv = ["manage.py", "threads", "a", "b", "c", "d", "--jobs", "2"]
+    Images()()
+    names = set(capsys.readouterr().out.split())
+    assert threading.current_thread().name not in names
+
+
+def test_batch_failures(capsys):
+    sys.argv = ["manage.py", "resize", "12", "13", "14"]
+    with pytest.raises(SystemExit) as exc_info:
+        Images()()
+    assert exc_info.value.code == 1
+
+    out = capsys.readouterr().out
+    assert "done 12px" in out
+    assert "done 14px" in out
+    assert "1 of 3 failed" in out
+    assert "ValueError: unlucky" in out
+
+
+def test_batch_invalid_jobs(capsys):
+    sys.argv = ["manage.py", "resize", "1", "--jobs=0"]
+    with pytest.raises(SystemExit) as exc_info:
+        Images()()
+    assert exc_info.value.code == 2
+    out = capsys.readouterr().out
+    assert "must be a positive integer" in out
+    assert "[--jobs=N]" in out
+    assert "RESIZE" in out
+
+
+def test_batch_processes(capsys):
+    sys.argv = ["manage.py", "pids", "1", "2", "3", "--jobs=2"]
+    Images()()
+    lines = capsys.readouterr().out.splitlines()
+    assert sorted(line.split()[0] for line in lines) == ["1", "2", "3"]
+    assert str(os.getpid()) not in {line.split()[1] for line in lines}
+
+
+def test_batch_async(capsys):
+    import asyncio
+    from contextlib import asynccontextmanager
+
+    events = []
+    running = []
+
+    class App(Cli):
+        @asynccontextmanager
+        async def _lifespan(self):
+            events.append("open")
+            self.db = {"1": "one", "2": "two", "3": "three", "4": "four"}
+            yield
+            events.append("close")
+
+        @batchable(jobs=2)
+        async def fetch(self, key):
+            running.append(key)
+            assert len(running) <= 2
+            echo(f"start {key}")
+            await asyncio.sleep(0.01)
+            if key == "4":
+                raise ValueError("unlucky")
+            echo(f"done {self.db[key]}")
+            running.remove(key)
+
+    sys.argv = ["manage.py", "fetch", "1", "2", "3", "4"]
+    with pytest.raises(SystemExit) as exc_info:
+        App()()
+    assert exc_info.value.code == 1
+    assert events == ["open", "close"]
+
+    out = capsys.readouterr().out
+    lines = out.splitlines()
+    for key, value in [("1", "one"), ("2", "two"), ("3", "three")]:
+        # Not interleaved with the others
+        index = lines.index(f"start {key}")
+        assert lines[index + 1] == f"done {value}"
+    assert "1 of 4 failed" in out
+    assert "ValueError: unlucky" in out
+
+
+def test_batch_async_processes():
+    with pytest.raises(TypeError):
+        @batchable(processes=True)
+        async def fetch(self, key):
+            pass
+
+
+def test_pools_are_imported_on_demand():
+    import subprocess
+
+    import proper_cli
+
+    code = (
+        "import sys\n"
+        "import proper_cli.main\n"
+        "print(sorted({'multiprocessing', 'concurrent.futures.process'} & set(sys.modules)))\n"
+    )
+    src = os.path.dirname(os.path.dirname(proper_cli.__file__))
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        env=dict(os.environ, PYTHONPATH=src), capture_output=True, text=True, check=True,
+    )
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,142 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from proper_cli import Cli, LazyGroup, batchable, completer
+from proper_cli.completion import COMPLETER, build_index
+
+
+class Db(Cli):
+    """Manage the database."""
+
+    def migrate(self, target, fake=False, verbosity=1):
+        """Run the migrations.
+
+        More details.
+        """
+
+    def reset(self):
+        """Drop everything"""
+
+
+class App(Cli):
+    def serve(self, port=8000, reload: bool = True):
+        """Start the server"""
+
+    @batchable
+    def resize(self, path):
+        """Resize images"""
+
+    db = Db
+
+
+def complete(index, line, shell="bash"):
+    words = line.split(" ")
+    candidates = completer.complete(index, words, len(words) - 1)
+    return completer.format_candidates(candidates, shell)
+
+
+def test_build_index():
+    index = {"tree": build_index(App())}
+    tree = index["tree"]
+    assert list(tree["commands"]) == ["resize", "serve", "db"]
+    assert tree["commands"]["serve"] == {
+        "summary": "Start the server",
+        "options": ["--port=", "--reload", "--no-reload", "--help"],
+    }
+    assert tree["commands"]["resize"]["options"] == ["--jobs=", "--help"]
+    assert tree["commands"]["db"]["summary"] == "Manage the database."
+    assert tree["commands"]["db"]["commands"]["migrate"]["summary"] == "Run the migrations."
+
+    assert complete(index, "app ") == ["resize", "serve", "db"]
+    assert complete(index, "app s") == ["serve"]
+    assert complete(index, "app serve --") == ["--port=", "--reload", "--no-reload", "--help"]
+    assert complete(index, "app serve --no") == ["--no-reload"]
+    assert complete(index, "app serve ") == []
+    assert complete(index, "app db m") == ["migrate"]
+    assert complete(index, "app db migrate foo --f") == ["--fake"]
+    assert complete(index, "app --help db ") == ["migrate", "reset"]
+    assert complete(index, "app nope ") == []
+
+    assert complete(index, "app db ", "zsh") == [
+        "migrate:Run the migrations.",
+        "reset:Drop everything",
+    ]
+    assert complete(index, "app d", "fish") == ["db\tManage the database."]
+
+
+def test_lazy_groups_are_indexed(tmp_path, monkeypatch):
+    (tmp_path / "lazy_completion_group.py").write_text(
+        "from proper_cli import Cli\n\n"
+        "class Group(Cli):\n"
+        "    def hello(self):\n"
+        "        '''Say hello'''\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    class Lazy(Cli):
+        lazy = LazyGroup("lazy_completion_group:Group")
+
+    tree = build_index(Lazy())
+    assert tree["commands"]["lazy"]["commands"]["hello"]["summary"] == "Say hello"
+
+
+@pytest.fixture()
+def program(tmp_path):
+    script = tmp_path / "myapp"
+    script.write_text(
+        "from proper_cli import Cli\n\n"
+        "class App(Cli):\n"
+        "    def hello(self, loud=False):\n"
+        "        '''Say hello'''\n\n"
+        "App()()\n"
+    )
+    src = os.path.dirname(os.path.dirname(completer.__file__))
+    env = dict(
+        os.environ,
+        PYTHONPATH=src,
+        PROPER_CLI_CACHE_DIR=str(tmp_path / "cache"),
+    )
+    return script, env
+
+
+@pytest.mark.parametrize("shell", ["bash", "zsh", "fish"])
+def test_script(program, shell):
+    script, env = program
+    env["PROPER_CLI_COMPLETION"] = shell
+    result = subprocess.run(
+        [sys.executable, str(script)], env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert str(COMPLETER) in result.stdout
+    assert "myapp" in result.stdout
+
+    (index_path,) = (script.parent / "cache").glob("completion-myapp-*.json")
+    assert str(index_path) in result.stdout
+
+
+def test_completer_rebuilds_stale_index(program):
+    script, env = program
+    env["PROPER_CLI_COMPLETION"] = "index"
+    subprocess.run([sys.executable, str(script)], env=env, check=True)
+    (index_path,) = (script.parent / "cache").glob("completion-myapp-*.json")
+    del env["PROPER_CLI_COMPLETION"]
+
+    def complete(*words):
+        result = subprocess.run(
+            [sys.executable, "-S", "-E", str(COMPLETER), str(index_path), "bash",
+             str(len(words) - 1), *words],
+            env=env, capture_output=True, text=True, check=True,
+        )
+        return result.stdout.splitlines()
+
+    assert complete("myapp", "h") == ["hello"]
+    assert complete("myapp", "hello", "--") == ["--loud", "--no-loud", "--help"]
+
+    script.write_text(script.read_text().replace("def hello", "def hi"))
+    index = json.loads(index_path.read_text())
+    os.utime(script, ns=(0, index["files"][str(script)] + 10**9))
+    assert complete("myapp", "h") == ["hi"]
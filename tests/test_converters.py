@@ -0,0 +1,103 @@
+import sys
+import typing as t
+from pathlib import Path
+
+import pytest
+
+from proper_cli import Cli
+from proper_cli.converters import ConversionError, build_plan
+
+
+def command(
+    count: int,
+    ratio: float = 1.0,
+    path: t.Optional[Path] = None,
+    include: list[int] = (),
+    retries=3,
+    name="x",
+    verbose=False,
+):
+    pass
+
+
+def test_build_plan():
+    plan = build_plan(command)
+    args, opts = plan.apply(
+        ["3", "0.5"],
+        {"path": "a/b", "include": ["1", "2"], "retries": "5", "name": "y"},
+    )
+    assert args == [3, 0.5]
+    assert opts == {
+        "path": Path("a/b"),
+        "include": [1, 2],
+        "retries": 5,
+        "name": "y",
+    }
+
+    assert plan.apply([], {"include": "7", "verbose": "yes"})[1] == {
+        "include": [7],
+        "verbose": True,
+    }
+    assert plan.apply([], {"verbose": True})[1] == {"verbose": True}
+
+
+def test_var_args():
+    def resize(*paths: Path, **sizes: int):
+        pass
+
+    plan = build_plan(resize)
+    assert plan.apply(["a", "b"], {"w": "3"}) == ([Path("a"), Path("b")], {"w": 3})
+
+
+def test_untyped_command():
+    def meh(a, b=None, c="x"):
+        pass
+
+    assert not build_plan(meh)
+
+
+def test_conversion_error():
+    plan = build_plan(command)
+    with pytest.raises(ConversionError) as error:
+        plan.apply(["three"], {})
+    assert "`count`" in str(error.value)
+
+
+def test_typed_command(capsys):
+    class Manage(Cli):
+        def add(self, a: int, b: int = 0):
+            """ADD"""
+            print(repr(a + b))
+
+    sys.argv = ["manage.py", "add", "2", "-b", "3"]
+    Manage()()
+    assert capsys.readouterr().out == "5\n"
+
+    sys.argv = ["manage.py", "add", "two"]
+    with pytest.raises(SystemExit) as exc_info:
+        Manage()()
+    assert exc_info.value.code == 2
+    out = capsys.readouterr().out
+    assert "Invalid value for `a`: 'two'" in out
+    assert "ADD" in out
+
+
+def test_flag_is_not_a_value(capsys):
+    plan = build_plan(command)
+    with pytest.raises(ConversionError) as error:
+        plan.apply([], {"retries": True})
+    assert "expected a value, not a flag" in str(error.value)
+    with pytest.raises(ConversionError):
+        plan.apply([], {"include": True})
+    assert plan.apply([], {"verbose": False})[1] == {"verbose": False}
+
+    class Manage(Cli):
+        def add(self, a: int, b: int = 0):
+            """ADD"""
+            print(repr(a + b))
+
+    sys.argv = ["manage.py", "add", "2", "-b"]
+    with pytest.raises(SystemExit) as exc_info:
+        Manage()()
+    assert exc_info.value.code == 2
+    assert "Invalid value for `b`: True" in capsys.readouterr().out
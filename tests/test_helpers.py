@@ -0,0 +1,98 @@
+import io
+import threading
+import time
+
+from proper_cli import Progress, progress
+
+
+class TTY(io.StringIO):
+    def isatty(self):
+        return True
+
+
+def test_progress_list():
+    stream = io.StringIO()
+    items = list(range(1000))
+    bar = progress(items, label="Items", stream=stream)
+    seen = []
+    for item in bar:
+        seen.append(item)
+        if item == 499:
+            assert bar.count == 500
+    assert seen == items
+    assert bar.count == 1000
+    assert stream.getvalue().startswith("Items: 1000/1000 (100%) in 0:0")
+
+
+def test_progress_generator():
+    stream = io.StringIO()
+    bar = Progress((i for i in range(300)), total=300, stream=stream)
+    assert sum(bar) == sum(range(300))
+    assert bar.count == 300
+    assert stream.getvalue().startswith("300/300 (100%) in ")
+
+
+def test_progress_break():
+    for items in (list(range(100)), (i for i in range(100))):
+        stream = io.StringIO()
+        bar = progress(items, total=100, stream=stream)
+        iterator = iter(bar)
+        for item in iterator:
+            if item == 9:
+                assert bar.count == 10
+                break
+        iterator.close()
+        assert stream.getvalue().startswith("10/100 (10%) in ")
+
+
+def test_progress_closed_before_starting():
+    stream = io.StringIO()
+    bar = Progress(total=10, stream=stream)
+    bar.close()
+    assert stream.getvalue() == "0/10 (0%) in 0:00\n"
+
+
+def test_progress_threads():
+    stream = io.StringIO()
+    with Progress(total=8000, stream=stream) as bar:
+        def work():
+            for _ in range(1000):
+                bar.update()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        bar.update(5)
+        assert bar.count == 8005
+
+
+def test_progress_logs_summaries():
+    stream = io.StringIO()
+    bar = Progress(
+        total=10, label="Slow", stream=stream, interval=0.01, log_interval=0.02
+    )
+    with bar:
+        for _ in range(5):
+            bar.update()
+        time.sleep(0.2)
+    lines = stream.getvalue().splitlines()
+    assert len(lines) >= 2
+    assert lines[0].startswith("Slow: 5/10 (50%), ")
+    assert lines[-1].startswith("Slow: 5/10 (50%) in ")
+
+
+def test_progress_tty():
+    stream = TTY()
+    with Progress(total=4, label="Tty", stream=stream, interval=0.01) as bar:
+        bar.update(2)
+        time.sleep(0.1)
+        assert "[" in stream.getvalue()
+        bar.update(2)
+    output = stream.getvalue()
+    assert "4/4" in output
+    assert output.endswith("\033[?25h")
+
+    bar = Progress(total=0, stream=stream)
+    assert "[" not in bar.render()
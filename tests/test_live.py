@@ -0,0 +1,121 @@
+import io
+import random
+import re
+
+import pytest
+
+from proper_cli import live
+from proper_cli.live import LiveRegion, diff_lines
+
+
+class TTY(io.StringIO):
+    def isatty(self):
+        return True
+
+
+def render(text, screen=None):
+    """Apply the output to a list of lines, like a terminal would.
+    Each line is a list of (character, escape sequences) cells."""
+    screen = screen if screen is not None else [[]]
+    # The cursor is at the start of the line after the region
+    row, col, sgr = len(screen) - 1, 0, ""
+    for token in re.findall(r"\033\[\??[0-9;]*[A-Za-z]|\r|\n|[^\033\r\n]+", text):
+        if token == "\r":
+            col = 0
+        elif token == "\n":
+            row += 1
+            col = 0
+            if row == len(screen):
+                screen.append([])
+        elif token.startswith("\033["):
+            num = int(re.sub(r"\D", "", token) or 1)
+            code = token[-1]
+            if code == "m":
+                sgr = "" if token == "\033[0m" else sgr + token
+            elif code == "A":
+                row -= num
+            elif code == "B":
+                row += num
+            elif code == "C":
+                col += num
+            elif code == "K":
+                del screen[row][col:]
+            elif code == "J":
+                del screen[row][col:]
+                del screen[row + 1 :]
+        else:
+            line = screen[row]
+            line.extend([(" ", "")] * (col - len(line)))
+            line[col : col + len(token)] = [(char, sgr) for char in token]
+            col += len(token)
+        assert row >= 0
+    return screen
+
+
+def cells(lines):
+    return render("".join(f"{line}\n" for line in lines))
+
+
+def test_diff_lines():
+    old = ["Downloading 10%", "file: a.txt", "eta 10s"]
+    assert diff_lines(old, old) == ""
+    assert render(diff_lines([], old)) == cells(old)
+
+    rand = random.Random(1)
+    words = [
+        "", "a", "abc", "abcdefghij", "abcdefghij 12345", "xyz", "\033[32mabc\033[0m"
+    ]
+    screen = [[]]
+    lines = []
+    for _ in range(300):
+        new = [rand.choice(words) for _ in range(rand.randrange(6))]
+        screen = render(diff_lines(lines, new), screen)
+        assert screen == cells(new)
+        lines = new
+
+
+def test_only_changed_lines_are_written():
+    old = ["Processing items", "done: 1000 of 5000", "<info>ok</info>"]
+    new = ["Processing items", "done: 1001 of 5000", "<info>ok</info>"]
+    text = diff_lines(old, new)
+    assert "Processing" not in text
+    assert "ok" not in text
+    assert "1 of 5000" in text
+    assert "done" not in text
+
+
+def test_live_region(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(live.time, "monotonic", lambda: now[0])
+    stream = TTY()
+
+    region = LiveRegion(stream, max_fps=10)
+    region.update(["<info>one</info>", "two"])
+    first = stream.getvalue()
+    assert first.startswith(live.HIDE_CURSOR)
+
+    # Throttled
+    region.update(["one", "three"])
+    assert stream.getvalue() == first
+
+    now[0] += 0.2
+    region.update(["one", "four"])
+    assert stream.getvalue() != first
+
+    region.update(["one", "five"])
+    region.close()
+    output = stream.getvalue()
+    assert output.endswith(live.SHOW_CURSOR)
+    assert "three" not in output
+    assert render(output) == cells(["one", "five"])
+    assert region.bytes_written == len(output)
+
+
+@pytest.mark.parametrize("frames", [1, 100])
+def test_live_region_not_a_tty(frames):
+    stream = io.StringIO()
+    with LiveRegion(stream) as region:
+        for i in range(frames):
+            region.update(f"<info>line</info> {i}\nsecond")
+            assert stream.getvalue() == ""
+    assert stream.getvalue() == f"line {frames - 1}\nsecond\n"
@@ -189,3 +189,318 @@ def test_hidden_command_has_help(get_out_text):
 
  CCC
 """
+
+
+def test_registry():
+    from proper_cli.registry import get_registry
+
+    registry = get_registry(Manager)
+    assert registry is get_registry(Manager)
+    assert list(registry.commands) == ["a", "b"]
+    assert registry.subgroups == {"foo": Foo, "lorem": Lorem}
+
+    cli = Manager()
+    assert list(cli._commands) == ["a", "b"]
+    assert cli._subgroups == {"foo": Foo, "lorem": Lorem}
+
+
+def test_help_cache(tmp_path, monkeypatch, capsys):
+    sys.argv = ["manage.py", "lorem", "ipsum", "--help"]
+    Manager(help_cache=tmp_path)()
+    expected = capsys.readouterr().out
+    assert "IPSUM" in expected
+    assert len(list(tmp_path.glob("help-*.json"))) == 1
+
+    def fail(*args):
+        raise AssertionError("not served from the cache")
+
+    monkeypatch.setattr(Lorem, "_render_help_command", fail)
+    Manager(help_cache=tmp_path)()
+    assert capsys.readouterr().out == expected
+
+
+def test_help_cache_per_program(tmp_path):
+    import os
+    import subprocess
+
+    import proper_cli
+
+    src = os.path.dirname(os.path.dirname(proper_cli.__file__))
+    env = dict(os.environ, PYTHONPATH=src)
+    outputs = []
+    for name in ("a", "b"):
+        script = tmp_path / name / "manage.py"
+        script.parent.mkdir()
+        script.write_text(
+            "from proper_cli import Cli\n\n"
+            "class Manage(Cli):\n"
+            f"    def {name}_command(self):\n"
+            "        pass\n\n"
+            f"Manage(help_cache={str(tmp_path / 'cache')!r})()\n"
+        )
+        result = subprocess.run(
+            [sys.executable, str(script), "--help"],
+            env=env, capture_output=True, text=True, check=True,
+        )
+        outputs.append(result.stdout)
+
+    assert "a_command" in outputs[0]
+    assert "b_command" in outputs[1]
+    assert "a_command" not in outputs[1]
+    assert len(list((tmp_path / "cache").glob("help-__main__.Manage-*.json"))) == 2
+
+
+def test_lazy_group(tmp_path, monkeypatch, get_out_text):
+    from proper_cli import LazyGroup
+
+    (tmp_path / "lazy_cli_group.py").write_text(
+        "from proper_cli import Cli\n\n"
+        "class Group(Cli):\n"
+        "    def hi(self, name):\n"
+        "        '''HI'''\n"
+        "        print(f'Hi {name}')\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    class App(Cli):
+        def a(self):
+            print("AAA")
+
+        lazy = LazyGroup("lazy_cli_group:Group")
+
+    sys.argv = ["manage.py", "a"]
+    App()()
+    assert "lazy_cli_group" not in sys.modules
+
+    sys.argv = ["manage.py", "lazy", "hi", "you"]
+    App()()
+    assert "lazy_cli_group" in sys.modules
+    assert get_out_text() == "AAA\nHi you\n"
+
+    assert App()._subgroups == {"lazy": sys.modules["lazy_cli_group"].Group}
+
+
+def test_profiling(monkeypatch, capsys):
+    import json
+    import time
+
+    from proper_cli import profiling
+
+    monkeypatch.setattr(
+        profiling, "profiler", profiling.Profiler(time.perf_counter())
+    )
+    sys.argv = ["manage.py", "lorem", "sit"]
+    Manager()()
+
+    report = json.loads(capsys.readouterr().err)
+    assert report["argv"] == sys.argv
+    assert set(report["phases"]) == {"import", "parse_args", "resolve", "command"}
+
+
+def test_async_command(capsys):
+    import asyncio
+    from contextlib import asynccontextmanager
+
+    loops = []
+    events = []
+
+    def new_loop():
+        loop = asyncio.new_event_loop()
+        loops.append(loop)
+        return loop
+
+    class App(Cli):
+        _loop_factory = new_loop
+
+        @asynccontextmanager
+        async def _lifespan(self):
+            events.append("open")
+            yield
+            events.append("close")
+
+        async def fetch(self, n: int):
+            results = await asyncio.gather(*[asyncio.sleep(0, i) for i in range(n)])
+            assert asyncio.get_running_loop() is loops[0]
+            print(sum(results))
+
+    sys.argv = ["manage.py", "fetch", "5"]
+    App()()
+    assert capsys.readouterr().out == "10\n"
+    assert events == ["open", "close"]
+    assert len(loops) == 1 and loops[0].is_closed()
+
+
+def test_async_command_sigterm():
+    import asyncio
+    import os
+    import signal
+
+    import pytest
+
+    from proper_cli.main import sigterm_handler
+
+    events = []
+
+    class App(Cli):
+        async def wait(self):
+            try:
+                os.kill(os.getpid(), signal.SIGTERM)
+                await asyncio.sleep(10)
+            finally:
+                events.append("cleanup")
+
+    sys.argv = ["manage.py", "wait"]
+    with pytest.raises(SystemExit) as exc_info:
+        App()()
+    assert exc_info.value.code == 1
+    assert events == ["cleanup"]
+    assert signal.getsignal(signal.SIGTERM) is sigterm_handler
+
+
+def test_async_command_ctrl_c(capsys):
+    import asyncio
+    import os
+    import signal
+
+    import pytest
+
+    events = []
+
+    class App(Cli):
+        async def wait(self):
+            try:
+                os.kill(os.getpid(), signal.SIGINT)
+                await asyncio.sleep(10)
+            finally:
+                events.append("cleanup")
+
+    sys.argv = ["manage.py", "wait"]
+    with pytest.raises(SystemExit) as exc_info:
+        App()()
+    assert exc_info.value.code == 1
+    assert events == ["cleanup"]
+    assert signal.getsignal(signal.SIGINT) is signal.default_int_handler
+
+
+def test_package_exports():
+    import importlib
+
+    import proper_cli
+
+    for module_name in ("helpers", "live", "main", "output"):
+        module = importlib.import_module(f"proper_cli.{module_name}")
+        for name in module.__all__:
+            assert proper_cli._EXPORTS[name] == module_name
+            assert getattr(proper_cli, name) is getattr(module, name)
+    assert set(proper_cli.__all__) <= set(dir(proper_cli))
+
+
+def test_asyncio_is_imported_on_demand():
+    import os
+    import subprocess
+
+    import proper_cli
+
+    code = (
+        "import sys\n"
+        "from proper_cli import Cli\n\n"
+        "class App(Cli):\n"
+        "    def sync(self):\n"
+        "        print('asyncio' in sys.modules)\n\n"
+        "    async def run(self):\n"
+        "        print('asyncio' in sys.modules)\n\n"
+        "App()()\n"
+    )
+    src = os.path.dirname(os.path.dirname(proper_cli.__file__))
+    env = dict(os.environ, PYTHONPATH=src)
+    outputs = [
+        subprocess.run(
+            [sys.executable, "-c", code, name],
+            env=env, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        for name in ("sync", "run")
+    ]
+    assert outputs == ["False", "True"]
+
+
+def test_command_not_found(get_out_text):
+    sys.argv = ["manage.py", "ipsun"]
+    Manager()()
+    out = get_out_text()
+
+    assert "Command `ipsun` not found" in out
+    assert out.endswith("""
+ Did you mean:
+
+   manage lorem ipsum
+
+ Usage:
+
+   manage <command> [args] [options]
+
+   Run `manage --help` for the list of commands.
+
+""")
+    # Not the full help
+    assert "Available Commands" not in out
+
+
+def test_command_not_found_without_suggestions(get_out_text):
+    sys.argv = ["manage.py", "lorem", "zzzzzz"]
+    Manager()()
+    out = get_out_text()
+
+    assert "Command `zzzzzz` not found" in out
+    assert "Did you mean" not in out
+    assert "Run `manage lorem --help` for the list of commands." in out
+
+
+def test_lazy_group_help(tmp_path, monkeypatch, get_out_text):
+    from proper_cli import LazyGroup
+
+    (tmp_path / "lazy_help_group.py").write_text(
+        "from proper_cli import Cli\n\n"
+        "class Group(Cli):\n"
+        "    def hi(self, name):\n"
+        "        '''HI'''\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    class App(Cli):
+        def a(self):
+            """AAA"""
+
+        lazy = LazyGroup("lazy_help_group:Group", help="Say hi")
+        quiet = LazyGroup("lazy_help_group:Group")
+
+    sys.argv = ["manage.py", "--help"]
+    App()()
+    assert "lazy_help_group" not in sys.modules
+    assert get_out_text().endswith("""
+ Available Commands:
+
+   a
+         AAA
+
+   lazy <command> [args]
+         Say hi
+
+   quiet <command> [args]
+
+""")
+
+    sys.argv = ["manage.py", "lazy", "--help"]
+    App()()
+    assert "lazy_help_group" in sys.modules
+    assert "lazy hi name" in get_out_text()
+
+    # The list is the same once it's imported
+    sys.argv = ["manage.py", "--help"]
+    App(show_params=False)()
+    assert get_out_text().endswith("""
+   lazy
+         Say hi
+
+   quiet
+
+""")
@@ -0,0 +1,60 @@
+import io
+
+from proper_cli import BufferedSink, batch, echo, get_sink
+
+
+def test_buffered_sink():
+    stream = io.StringIO()
+    sink = BufferedSink(stream, max_size=10)
+
+    sink.write("foo\n")
+    assert stream.getvalue() == ""
+
+    sink.write("bar\n")
+    sink.write("baz\n")
+    assert stream.getvalue() == "foo\nbar\nbaz\n"
+
+    sink.write("meh\n")
+    sink.flush()
+    assert stream.getvalue() == "foo\nbar\nbaz\nmeh\n"
+    sink.close()
+
+
+def test_buffered_sink_tty():
+    class TTY(io.StringIO):
+        def isatty(self):
+            return True
+
+    stream = TTY()
+    sink = BufferedSink(stream)
+    sink.write("foo\n")
+    assert stream.getvalue() == "foo\n"
+    sink.close()
+
+
+def test_batch(capsys):
+    default_sink = get_sink()
+
+    with batch() as sink:
+        assert get_sink() is sink
+        echo("foo")
+        with batch() as inner:
+            assert inner is sink
+            echo("bar")
+        assert capsys.readouterr().out == ""
+
+    assert get_sink() is default_sink
+    assert capsys.readouterr().out == "foo\nbar\n"
+
+
+def test_echo_stream():
+    from proper_cli import echo_stream, set_sink
+    from proper_cli.output import StreamSink
+
+    stream = io.StringIO()
+    previous = set_sink(StreamSink(stream))
+    try:
+        echo_stream(["<info>one\n", "two</", "info>\n"])
+    finally:
+        set_sink(previous)
+    assert stream.getvalue() == "one\ntwo\n"
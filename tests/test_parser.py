@@ -92,3 +92,39 @@ def test_typo_flag():
     result = parse_args(["-abc", "-abc", "123"])
     expected = ([], {"abc": "123"})
     assert result == expected
+
+
+def test_parse_iterator():
+    result = parse_args(iter(["foo", "-n=1", "-n", "2", "", "-x"]))
+    expected = (["foo"], {"n": ["1", "2", ""], "x": True})
+    assert result == expected
+
+
+def test_end_of_options():
+    result = parse_args(["run", "--", "a.txt", "b.txt"])
+    expected = (["run", "a.txt", "b.txt"], {})
+    assert result == expected
+
+    result = parse_args(["--", "-x", "a"])
+    expected = (["-x", "a"], {})
+    assert result == expected
+
+    result = parse_args(["run", "-v", "--", "--foo=bar", "-3", "--"])
+    expected = (["run", "--foo=bar", "-3", "--"], {"v": True})
+    assert result == expected
+
+
+def test_lone_dash_ends_the_previous_key():
+    result = parse_args(["run", "-v", "-", "a.txt"])
+    expected = (["run", "a.txt"], {"v": True})
+    assert result == expected
+
+    result = parse_args(["-", "-x", "a"])
+    expected = ([], {"x": "a"})
+    assert result == expected
+
+
+def test_negative_numbers():
+    result = parse_args(["-n", "-3", "-45", "-x", "-7"])
+    expected = ([], {"n": ["-3", "-45"], "x": "-7"})
+    assert result == expected
@@ -0,0 +1,292 @@
+import os
+import subprocess
+import sys
+import textwrap
+import time
+from pathlib import Path
+
+import pytest
+
+from proper_cli import server
+
+
+pytestmark = pytest.mark.skipif(
+    not server.is_available(), reason="requires fork() and Unix sockets"
+)
+
+SRC = str(Path(server.__file__).parent.parent)
+
+
+@pytest.fixture()
+def app(tmp_path, monkeypatch):
+    (tmp_path / "warm_app.py").write_text(textwrap.dedent("""
+        import os
+        from proper_cli import Cli
+
+
+        class App(Cli):
+            def pid(self):
+                print(os.getpid())
+
+            def ppid(self):
+                print(os.getppid())
+
+            def cwd(self):
+                print(os.getcwd())
+
+            def fail(self):
+                raise SystemExit(3)
+
+        cli = App()
+    """))
+    (tmp_path / "client.py").write_text(textwrap.dedent("""
+        import sys
+        from proper_cli.server import run, stop
+
+        if sys.argv[1:] == ["stop"]:
+            sys.argv = sys.argv[:1]
+            sys.exit(0 if stop("warm_app:cli") else 4)
+        run("warm_app:cli", idle_timeout=10)
+    """))
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join([SRC, str(tmp_path)]),
+        PROPER_CLI_RUNTIME_DIR=str(tmp_path / "run"),
+    )
+    env.pop(server.SERVER_ENV, None)
+
+    def call(*args, cwd=tmp_path):
+        return subprocess.run(
+            [sys.executable, str(tmp_path / "client.py"), *args],
+            cwd=cwd,
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=20,
+        )
+
+    yield call
+    call("stop")
+
+
+def wait_for_socket(directory):
+    for _ in range(100):
+        if directory.exists() and list(directory.glob("*.sock")):
+            return
+        time.sleep(0.05)
+    raise AssertionError("the server did not start")
+
+
+def test_run_in_server(app, tmp_path):
+    first = app("pid")
+    assert first.returncode == 0
+    wait_for_socket(tmp_path / "run")
+
+    second = app("pid")
+    assert second.returncode == 0
+    assert second.stdout.strip() != first.stdout.strip()
+
+    workdir = tmp_path / "other"
+    workdir.mkdir()
+    result = app("cwd", cwd=workdir)
+    assert result.stdout.strip() == str(workdir)
+
+
+def test_exit_code(app, tmp_path):
+    app("pid")
+    wait_for_socket(tmp_path / "run")
+    assert app("fail").returncode == 3
+
+
+def test_stop(app, tmp_path):
+    app("pid")
+    wait_for_socket(tmp_path / "run")
+    assert app("stop").returncode == 0
+    time.sleep(0.2)
+    assert app("stop").returncode == 4
+
+
+def test_disabled(monkeypatch, tmp_path, capsys):
+    monkeypatch.setenv(server.SERVER_ENV, "0")
+    monkeypatch.setenv(server.RUNTIME_DIR_ENV, str(tmp_path))
+    calls = []
+    monkeypatch.setattr(server, "_load", lambda target: lambda: calls.append(target))
+    server.run("warm_app:cli")
+    assert calls == ["warm_app:cli"]
+    assert not list(tmp_path.glob("*.sock"))
+
+
+def test_socket_dir_must_be_private(monkeypatch, tmp_path):
+    private = tmp_path / "private"
+    monkeypatch.setenv(server.RUNTIME_DIR_ENV, str(private))
+    path = server.get_socket_path("warm_app:cli")
+    assert path is not None
+    assert os.path.dirname(path) == str(private)
+    assert os.stat(private).st_mode & 0o777 == 0o700
+
+    shared = tmp_path / "shared"
+    shared.mkdir(mode=0o755)
+    shared.chmod(0o755)
+    monkeypatch.setenv(server.RUNTIME_DIR_ENV, str(shared))
+    assert server.get_socket_path("warm_app:cli") is None
+
+    link = tmp_path / "link"
+    link.symlink_to(private)
+    monkeypatch.setenv(server.RUNTIME_DIR_ENV, str(link))
+    assert server.get_socket_path("warm_app:cli") is None
+
+
+def test_unsafe_socket_dir_runs_without_server(monkeypatch, tmp_path):
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    monkeypatch.setenv(server.RUNTIME_DIR_ENV, str(shared))
+    monkeypatch.delenv(server.SERVER_ENV, raising=False)
+    calls = []
+    monkeypatch.setattr(server, "_load", lambda target: lambda: calls.append(target))
+    server.run("warm_app:cli")
+    assert calls == ["warm_app:cli"]
+    assert not server.stop("warm_app:cli")
+    assert not list(shared.iterdir())
+
+
+def test_worker_rejects_other_users(monkeypatch, tmp_path):
+    import socket
+
+    path = str(tmp_path / "test.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(1)
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(path)
+    assert server.get_peer_uid(client) == os.getuid()
+
+    monkeypatch.setattr(server, "get_peer_uid", lambda conn: os.getuid() + 1)
+    notify_r, notify_w = os.pipe()
+    calls = []
+    worker = server._Worker(lambda: calls.append("run"), {})
+    try:
+        assert worker.handle(listener, notify_w) == 1
+        assert os.read(notify_r, 1) == server.REJECTED
+        assert client.recv(1) == b""
+        assert calls == []
+    finally:
+        client.close()
+        os.close(notify_r)
+        os.close(notify_w)
+
+
+def test_client_imports_only_the_server(tmp_path):
+    code = (
+        "import sys\n"
+        "import proper_cli.server\n"
+        "print(sorted(name for name in sys.modules if name.startswith('proper_cli')))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        env=dict(os.environ, PYTHONPATH=SRC),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "['proper_cli', 'proper_cli.server']"
+
+
+def test_client_keeps_a_dead_socket(tmp_path):
+    import socket
+
+    path = str(tmp_path / "test.sock")
+    dead = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    dead.bind(path)
+    dead.close()
+    assert server._request(path, ["manage.py"]) is None
+    # Only a server holding the lock removes it
+    assert os.path.exists(path)
+
+
+def test_one_server_at_a_time(tmp_path):
+    path = str(tmp_path / "test.sock.lock")
+    lock = server._lock(path, 0)
+    assert lock is not None
+    try:
+        assert server._lock(path, 0.1) is None
+    finally:
+        os.close(lock)
+    lock = server._lock(path, 0)
+    assert lock is not None
+    os.close(lock)
+
+
+def test_server_replaces_a_dead_socket(app, tmp_path, monkeypatch):
+    import socket
+
+    monkeypatch.setenv(server.RUNTIME_DIR_ENV, str(tmp_path / "run"))
+    monkeypatch.setattr(sys, "argv", [str(tmp_path / "client.py")])
+    path = server.get_socket_path("warm_app:cli")
+    dead = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    dead.bind(path)
+    dead.close()
+
+    # Run in this process's child, and start the server
+    assert app("ppid").stdout.strip() == str(os.getpid())
+    wait_for_socket(tmp_path / "run")
+    for _ in range(100):
+        result = app("ppid")
+        if result.stdout.strip() != str(os.getpid()):
+            break
+        time.sleep(0.05)
+    # Run in a worker of the server
+    assert result.returncode == 0
+    assert result.stdout.strip() != str(os.getpid())
+
+
+def test_client_gives_up_if_no_worker_answers(monkeypatch, tmp_path):
+    import socket
+
+    monkeypatch.setattr(server, "REPLY_TIMEOUT", 0.2)
+    path = str(tmp_path / "test.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(1)
+    try:
+        start = time.monotonic()
+        assert server._request(path, ["manage.py"]) is None
+        assert time.monotonic() - start < 2
+    finally:
+        listener.close()
+
+
+def test_worker_waits_for_the_client(tmp_path):
+    import json
+    import socket
+    import threading
+
+    path = str(tmp_path / "test.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(1)
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(path)
+    data = json.dumps({"argv": ["manage.py"], "cwd": str(tmp_path), "env": {}})
+    data = data.encode("utf8")
+    socket.send_fds(client, [server.HEADER.pack(len(data)) + data], [0, 1, 2])
+
+    notify_r, notify_w = os.pipe()
+    calls = []
+    codes = []
+    worker = server._Worker(lambda: calls.append("run"), {})
+    thread = threading.Thread(
+        target=lambda: codes.append(worker.handle(listener, notify_w))
+    )
+    thread.start()
+    try:
+        assert client.makefile("rb").readline().startswith(b"pid ")
+        # As if the client had given up waiting
+        client.close()
+        thread.join(5)
+        assert codes == [1]
+        assert os.read(notify_r, 1) == server.ACCEPTED
+        assert calls == []
+    finally:
+        client.close()
+        os.close(notify_r)
@@ -0,0 +1,121 @@
+import random
+import string
+import sys
+
+from proper_cli import Cli, LazyGroup
+from proper_cli.suggestions import WordIndex, edit_distance, get_suggestions
+
+
+class Db(Cli):
+    def migrate(self):
+        pass
+
+    def reset(self):
+        pass
+
+    def status(self):
+        pass
+
+
+class App(Cli):
+    def new(self):
+        pass
+
+    def serve(self):
+        pass
+
+    def status(self):
+        pass
+
+    db = Db
+    lazy = LazyGroup("not_imported_for_suggestions:Group")
+
+
+def test_edit_distance():
+    assert edit_distance("", "") == 0
+    assert edit_distance("abc", "") == 3
+    assert edit_distance("", "abc") == 3
+    assert edit_distance("serve", "serve") == 0
+    assert edit_distance("serv", "serve") == 1
+    assert edit_distance("srve", "serve") == 1
+    assert edit_distance("sarve", "serve") == 1
+    assert edit_distance("kitten", "sitting") == 3
+    assert edit_distance("sitting", "kitten") == 3
+    # Transpositions
+    assert edit_distance("nwe", "new") == 1
+    assert edit_distance("sevre", "serve") == 1
+    assert edit_distance("ab", "ba") == 1
+    assert edit_distance("abcd", "badc") == 2
+    # A substring is not edited twice
+    assert edit_distance("ca", "abc") == 3
+
+
+def slow_edit_distance(a, b):
+    table = [list(range(len(b) + 1))]
+    for i, char_a in enumerate(a, 1):
+        row = [i]
+        for j, char_b in enumerate(b, 1):
+            cost = min(
+                table[i - 1][j] + 1,
+                row[j - 1] + 1,
+                table[i - 1][j - 1] + (char_a != char_b),
+            )
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                cost = min(cost, table[i - 2][j - 2] + 1)
+            row.append(cost)
+        table.append(row)
+    return table[-1][-1]
+
+
+def test_edit_distance_matches_the_dynamic_programming_table():
+    rand = random.Random(7)
+    for _ in range(2000):
+        a = "".join(rand.choices("abcd", k=rand.randint(0, 12)))
+        b = "".join(rand.choices("abcd", k=rand.randint(0, 12)))
+        assert edit_distance(a, b) == slow_edit_distance(a, b), (a, b)
+
+    long = "x" * 70 + "abc"
+    assert edit_distance(long, "abc") == 70
+    assert edit_distance("abc", long) == 70
+
+
+def test_word_index_finds_the_same_as_a_full_scan():
+    rand = random.Random(42)
+    words = [
+        "".join(rand.choices(string.ascii_lowercase[:6], k=rand.randint(1, 8)))
+        for _ in range(500)
+    ]
+    index = WordIndex(words)
+    assert len(index) == len(set(words))
+
+    for word in words[:50] + ["", "abc", "ffffffffff"]:
+        for max_distance in (0, 1, 2, 3):
+            expected = sorted(
+                (edit_distance(word, other), other)
+                for other in set(words)
+                if edit_distance(word, other) <= max_distance
+            )
+            assert index.search(word, max_distance) == expected
+
+
+def test_empty_word_index():
+    assert WordIndex().search("foo", 2) == []
+
+
+def test_get_suggestions():
+    assert get_suggestions(App, "serv") == ["serve"]
+    assert get_suggestions(App, "sevre") == ["serve"]
+    assert get_suggestions(App, "nwe") == ["new"]
+    assert get_suggestions(App, "migrat") == ["db migrate"]
+    assert get_suggestions(App, "dv") == ["db"]
+    assert get_suggestions(App, "status") == ["status", "db status"]
+    assert get_suggestions(App, "lazzy") == ["lazy"]
+    assert get_suggestions(App, "zzzzzz") == []
+    assert get_suggestions(Db, "rest") == ["reset"]
+    assert "not_imported_for_suggestions" not in sys.modules
+
+
+def test_get_suggestions_limit():
+    attrs = {f"cmd{i}": (lambda self: None) for i in range(10)}
+    Many = type("Many", (Cli,), attrs)
+    assert get_suggestions(Many, "cmd", limit=3) == ["cmd0", "cmd1", "cmd2"]